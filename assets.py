@@ -0,0 +1,85 @@
+"""Caches for pre-rendered artwork and text.
+
+Drawing the penguin, hearts and pipes out of pygame.draw primitives every
+frame is wasteful when they never change. SpriteCache rasterizes each one
+once into a Surface converted to the display format, keyed by whatever
+changes its pixels (size, broken/whole, ...), and hands it back for a
+plain blit from then on. TextCache does the same for font rendering.
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class SpriteCache:
+    """Bounded LRU of pre-rendered Surfaces.
+
+    get(key, factory) returns the cached Surface for key, calling
+    factory() to draw it the first time. Everything is dropped when the
+    display surface changes, because converted Surfaces are tied to the
+    pixel format of the window they were converted for.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._sprites = OrderedDict()
+        self._display = None
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Forget every cached sprite"""
+        self._sprites.clear()
+        self._display = None
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def get(self, key, factory):
+        """Cached sprite for key, drawn with factory() on a miss"""
+        display = pygame.display.get_surface()
+        if display is not self._display:
+            self._sprites.clear()
+            self._display = display
+
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self._sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = factory()
+        if display is not None:
+            sprite = self._convert(sprite)
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.max_entries:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    @staticmethod
+    def _convert(sprite):
+        """Convert to the display format, keeping per-pixel or surface alpha"""
+        if sprite.get_flags() & pygame.SRCALPHA:
+            return sprite.convert_alpha()
+        alpha = sprite.get_alpha()
+        converted = sprite.convert()
+        if alpha is not None:
+            converted.set_alpha(alpha)
+        return converted
+
+    def stats(self):
+        """Hit/miss counters and current size, for profiling"""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._sprites)}
+
+
+class TextCache(SpriteCache):
+    """LRU of rendered strings keyed by (font, text, antialias, color)"""
+
+    def render(self, font, text, antialias, color):
+        """Drop-in for font.render(text, antialias, color)"""
+        return self.get((font, text, antialias, color), lambda: font.render(text, antialias, color))
+
+
+sprites = SpriteCache()
+texts = TextCache(max_entries=256)
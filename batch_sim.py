@@ -0,0 +1,214 @@
+"""Vectorized batch simulator: steps thousands of games at once with NumPy.
+
+BatchGame holds the same state as simulation.Game, one row per game, and
+applies the same rules in a handful of array operations per frame. Each row
+reproduces simulation.Game(seed=seed, physics=physics).step() bit-for-bit
+when fed the same flaps.
+
+Needs NumPy.
+"""
+import random
+
+import numpy as np
+
+from simulation import (
+    SCREEN_WIDTH,
+    SCREEN_HEIGHT,
+    PIPE_WIDTH,
+    DEFAULT_PHYSICS,
+)
+
+BIRD_X = SCREEN_WIDTH // 4
+BIRD_START_Y = SCREEN_HEIGHT // 2
+BIRD_HEIGHT = 20
+GROUND_Y = SCREEN_HEIGHT - 50
+
+
+class BatchGame:
+    """N independent games stepped together"""
+
+    def __init__(self, seeds, total_lives=3, max_pipes=8, physics=DEFAULT_PHYSICS):
+        self.physics = physics
+        self.seeds = list(seeds)
+        self.rngs = [random.Random(seed) for seed in self.seeds]
+        n = self.size = len(self.seeds)
+        self.total_lives = total_lives
+
+        # Bird state
+        self.bird_y = np.full(n, BIRD_START_Y, dtype=np.float64)
+        self.bird_velocity = np.zeros(n, dtype=np.float64)
+        self.bird_alive = np.ones(n, dtype=bool)
+
+        # Game state
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.full(n, total_lives, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.game_ended = np.zeros(n, dtype=bool)
+        self.pipe_velocity = np.full(n, physics.pipe_velocity_start, dtype=np.float64)
+        self.pipe_spawn_timer = np.zeros(n, dtype=np.int64)
+        self.pipe_spawn_interval = np.full(n, physics.spawn_interval, dtype=np.int64)
+        self.frames = np.zeros(n, dtype=np.int64)
+
+        # Pipe state, one column per pipe slot
+        self._alloc_pipes(max_pipes)
+
+    def _alloc_pipes(self, columns):
+        """(Re)allocate the pipe arrays, keeping whatever is already there"""
+        shape = (self.size, columns)
+        fields = {
+            "pipe_x": (np.float64, 0.0),
+            "pipe_dx": (np.float64, 0.0),
+            "gap_start": (np.int64, 0),
+            "gap_end": (np.int64, 0),
+            "top_height": (np.int64, 0),
+            "bottom_height": (np.int64, 0),
+            "reversed_gap": (bool, False),
+            "scored": (bool, False),
+            "active": (bool, False),
+        }
+        for name, (dtype, fill) in fields.items():
+            new = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                new[:, :old.shape[1]] = old
+            setattr(self, name, new)
+
+    def reset_games(self, indices, seeds):
+        """Start brand new games in the given rows, like Game.new_game(seed)"""
+        for i, seed in zip(indices, seeds):
+            self.seeds[i] = seed
+            self.rngs[i] = random.Random(seed)
+        self.bird_y[indices] = BIRD_START_Y
+        self.bird_velocity[indices] = 0.0
+        self.bird_alive[indices] = True
+        self.score[indices] = 0
+        self.lives[indices] = self.total_lives
+        self.game_over[indices] = False
+        self.game_ended[indices] = False
+        self.pipe_velocity[indices] = self.physics.pipe_velocity_start
+        self.pipe_spawn_timer[indices] = 0
+        self.pipe_spawn_interval[indices] = self.physics.spawn_interval
+        self.frames[indices] = 0
+        self.active[indices] = False
+
+    def continue_rounds(self, mask):
+        """Spend the next life in the masked games: fresh bird, no pipes"""
+        self.bird_y[mask] = BIRD_START_Y
+        self.bird_velocity[mask] = 0.0
+        self.bird_alive[mask] = True
+        self.active[mask] = False
+        self.game_over[mask] = False
+
+    def spawn_pipe(self, i):
+        """Create a new pipe in game i, drawing from its RNG like Game.spawn_pipe"""
+        rng = self.rngs[i]
+        physics = self.physics
+        reversed_gap = self.score[i] >= physics.hard_score and rng.random() < physics.reversed_chance
+        gap_position = rng.randint(50, SCREEN_HEIGHT - 50 - physics.pipe_gap - 50)
+
+        free = np.flatnonzero(~self.active[i])
+        if not len(free):
+            self._alloc_pipes(self.active.shape[1] * 2)
+            free = np.flatnonzero(~self.active[i])
+        slot = free[0]
+
+        self.pipe_x[i, slot] = SCREEN_WIDTH
+        self.pipe_dx[i, slot] = self.pipe_velocity[i]
+        self.gap_start[i, slot] = gap_position
+        self.gap_end[i, slot] = gap_position + physics.pipe_gap
+        if reversed_gap:
+            self.bottom_height[i, slot] = gap_position
+            self.top_height[i, slot] = GROUND_Y - (gap_position + physics.pipe_gap)
+        else:
+            self.top_height[i, slot] = gap_position
+            self.bottom_height[i, slot] = GROUND_Y - (gap_position + physics.pipe_gap)
+        self.reversed_gap[i, slot] = reversed_gap
+        self.scored[i, slot] = False
+        self.active[i, slot] = True
+
+    def step(self, flap=None):
+        """Advance every game one frame, mirroring simulation.Game.step()"""
+        # Spend the next life straight away after a crash
+        restart = self.game_over & ~self.game_ended
+        if restart.any():
+            self.continue_rounds(restart)
+
+        physics = self.physics
+        running = ~self.game_ended
+        if flap is not None:
+            self.bird_velocity[running & flap] = physics.flap_strength
+
+        # Update bird
+        self.bird_velocity = np.where(running, self.bird_velocity + physics.gravity, self.bird_velocity)
+        self.bird_y = np.where(running, self.bird_y + self.bird_velocity, self.bird_y)
+        crashed = running & ((self.bird_y + BIRD_HEIGHT >= GROUND_Y) | (self.bird_y <= 0))
+        self.bird_alive &= ~crashed
+        lives_lost = crashed.astype(np.int64)
+        self.frames += running
+
+        # Spawn pipes
+        self.pipe_spawn_timer += running
+        spawning = running & (self.pipe_spawn_timer >= self.pipe_spawn_interval)
+        for i in np.flatnonzero(spawning):
+            self.spawn_pipe(i)
+        self.pipe_spawn_timer[spawning] = 0
+
+        # Update pipes
+        moving = self.active & running[:, None]
+        self.pipe_x = np.where(moving, self.pipe_x + self.pipe_dx, self.pipe_x)
+
+        # Check collision, with the same truncation pygame.Rect applies
+        bird_top = np.trunc(self.bird_y + 2).astype(np.int64)[:, None]
+        bird_left = int(BIRD_X + 5)
+        pipe_left = np.trunc(self.pipe_x).astype(np.int64)
+        overlap_x = (bird_left < pipe_left + PIPE_WIDTH) & (bird_left + 20 > pipe_left)
+        bottom_top = np.where(self.reversed_gap, GROUND_Y - self.bottom_height, self.gap_end)
+        hit_top = (bird_top < self.top_height) & (bird_top + 20 > 0)
+        hit_bottom = (bird_top + 20 > bottom_top) & (bird_top < bottom_top + self.bottom_height)
+        hits = moving & overlap_x & (hit_top | hit_bottom)
+        lives_lost += hits.sum(axis=1)
+
+        # Check if bird passed pipe; every pass ramps difficulty once
+        passed = moving & ~self.scored & (self.pipe_x + PIPE_WIDTH < BIRD_X)
+        self.scored |= passed
+        passes = passed.sum(axis=1)
+        for k in range(int(passes.max(initial=0))):
+            ramp = passes > k
+            self.score += ramp
+            early = ramp & (self.score < physics.hard_score)
+            late = ramp & ~early
+            self.pipe_velocity = np.where(early, self.pipe_velocity - physics.early_speedup, self.pipe_velocity)
+            self.pipe_velocity = np.where(late, self.pipe_velocity - physics.late_speedup, self.pipe_velocity)
+            late_faster = late & (self.pipe_spawn_interval > physics.min_spawn_interval)
+            self.pipe_spawn_interval -= physics.spawn_interval_step * late_faster
+
+        # Remove off-screen pipes
+        self.active &= ~(moving & (self.pipe_x + PIPE_WIDTH < 0))
+
+        self.game_over |= lives_lost > 0
+        self.lives -= lives_lost
+        self.game_ended |= self.lives <= 0
+
+    def next_pipe(self):
+        """Nearest pipe not yet behind each bird: (x, opening top, opening bottom).
+
+        Games with no pipe ahead get a pipe at the right edge with the
+        opening centered on the starting height.
+        """
+        ahead = self.active & (self.pipe_x + PIPE_WIDTH >= BIRD_X)
+        x = np.where(ahead, self.pipe_x, np.inf)
+        slot = x.argmin(axis=1)
+        rows = np.arange(self.size)
+        found = ahead[rows, slot]
+        pipe_x = np.where(found, self.pipe_x[rows, slot], SCREEN_WIDTH)
+        gap = self.physics.pipe_gap
+        top = np.where(found, self.top_height[rows, slot], BIRD_START_Y - gap // 2)
+        return pipe_x, top, top + gap
+
+    def run(self, policy, max_frames=100000):
+        """Play until every game has ended; policy(batch) returns the flap mask"""
+        for _ in range(max_frames):
+            if self.game_ended.all():
+                break
+            self.step(policy(self))
+        return self.score.copy()
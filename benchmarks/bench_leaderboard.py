@@ -0,0 +1,48 @@
+"""Leaderboard cost per frame as the score table grows.
+
+The menus ask for the top 5 (start screen) or top 3 (game over,
+celebration) every frame. This compares sorting the whole table on each
+call, as ScoreManager used to, with the incremental Leaderboard index.
+
+    python benchmarks/bench_leaderboard.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scores import Leaderboard  # noqa: E402
+
+SIZES = [100, 1000, 10000, 100000, 250000]
+FRAME_BUDGET_US = 1e6 / 60
+
+
+def full_sort_top(scores, k):
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+
+def per_call_us(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'players':>8}  {'sort top5 us':>12}  {'index top5 us':>13}  {'index update us':>15}  {'index rank us':>13}")
+    for size in SIZES:
+        scores = {f"player{i}": rng.randint(0, 500) for i in range(size)}
+        board = Leaderboard(scores)
+        names = list(scores)
+
+        sort_us = per_call_us(lambda: full_sort_top(scores, 5), max(1, 20000 // size))
+        top_us = per_call_us(lambda: board.top(5), 10000)
+        update_us = per_call_us(lambda: board.update(rng.choice(names), rng.randint(0, 500)), 2000)
+        rank_us = per_call_us(lambda: board.rank(rng.choice(names)), 10000)
+        print(f"{size:>8}  {sort_us:>12.1f}  {top_us:>13.2f}  {update_us:>15.2f}  {rank_us:>13.2f}")
+
+    print(f"\n(one frame at 60 FPS is {FRAME_BUDGET_US:.0f} us)")
+
+
+if __name__ == "__main__":
+    main()
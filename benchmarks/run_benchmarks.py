@@ -0,0 +1,256 @@
+"""Benchmark suite with a stored baseline.
+
+Cases:
+    update_low_fps, update_high_fps   headless Game.update frames per second,
+                                      from a fresh game and at full speed
+                                      (score 40, pipes spawning every 60 frames)
+    draw_game_us, draw_heart_us,      drawing cost per call on an off-screen
+    draw_bird_us                      surface (SDL dummy video driver)
+    add_score_<n>_us,                 ScoreManager with n players already on
+    top_scores_<n>_us                 the board, n = 10, 10k, 1M
+    startup_ms                        new process to first frame on screen
+
+Results are written as JSON (stdout, or --output) and compared with
+benchmarks/baseline.json; any case more than --tolerance worse than its
+baseline is reported and the exit status is 1. Timings are the best of
+--repeat runs. Baselines only mean something on the machine that recorded
+them, so record your own before comparing:
+
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py                 # compare
+    python benchmarks/run_benchmarks.py --only update   # just the update cases
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import simulation  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PLAYER_COUNTS = {"10": 10, "10k": 10000, "1m": 1000000}
+
+# Time from process start to the first flipped frame, printed by the child
+STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+import main
+main.init_display()
+game = main.Game()
+game.draw(main.screen)
+main.pygame.display.flip()
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def best_of(repeat, run):
+    """Smallest result of `repeat` calls to run()"""
+    return min(run() for _ in range(repeat))
+
+
+# ==================== CASES ====================
+def make_game(high, game_class=simulation.Game):
+    """A seeded game in play, optionally already at high difficulty"""
+    game = game_class()
+    game.reset(1)
+    if high:
+        game.score = 40
+        game.pipe_velocity = simulation.PIPE_VELOCITY_START - 15 * 0.08 - 25 * 0.25
+        game.pipe_spawn_interval = 60
+    game.game_started = True
+    # Warm up until pipes are on screen
+    for _ in range(250):
+        simulation.hold_in_opening(game)
+        game.update()
+    return game
+
+
+def bench_update(high, frames, games, repeat):
+    """Frames per second of Game.update over `games` fresh games, the autopilot's cost included"""
+    def run():
+        elapsed = 0.0
+        for _ in range(games):
+            game = make_game(high)
+            started = time.perf_counter()
+            for _ in range(frames):
+                simulation.hold_in_opening(game)
+                game.update()
+            elapsed += time.perf_counter() - started
+            assert not game.game_over
+        return elapsed
+    return frames * games / best_of(repeat, run)
+
+
+def per_call_us(call, number, repeat):
+    def run():
+        started = time.perf_counter()
+        for _ in range(number):
+            call()
+        return time.perf_counter() - started
+    return best_of(repeat, run) / number * 1e6
+
+
+def bench_drawing(number, repeat):
+    import pygame
+    import main
+
+    main.init_display()
+    surface = pygame.Surface((simulation.SCREEN_WIDTH, simulation.SCREEN_HEIGHT))
+    game = make_game(False, main.Game)
+    game.player_name = "bench"
+    return {
+        "draw_game_us": per_call_us(lambda: game.draw(surface, 0.5), number, repeat),
+        "draw_heart_us": per_call_us(lambda: game.draw_heart(surface, 100, 40, 30, True), number, repeat),
+        "draw_bird_us": per_call_us(lambda: game.bird.draw(surface, 0.5), number, repeat),
+    }
+
+
+def bench_scores(repeat):
+    """add_score (a new best each time) and get_top_scores at several table sizes"""
+    import random
+    from scores import JSONScoreStore, ScoreManager
+
+    results = {}
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        for label, players in PLAYER_COUNTS.items():
+            filename = os.path.join(directory, f"scores-{label}.json")
+            JSONScoreStore(filename).save({f"player{i}": rng.randint(0, 500) for i in range(players)})
+            # No writer thread: its copies of the table would run alongside the calls being timed.
+            # The save is stubbed out too, so this is the in-memory cost the game thread pays
+            manager = ScoreManager(filename, background=False)
+            manager.store.save = lambda scores: None
+            scores = iter(range(1000, 10 ** 9))
+            results[f"add_score_{label}_us"] = per_call_us(
+                lambda: manager.add_score(f"player{rng.randrange(players)}", next(scores)), 2000, repeat)
+            results[f"top_scores_{label}_us"] = per_call_us(lambda: manager.get_top_scores(5), 10000, repeat)
+            manager.close()
+    return results
+
+
+def bench_startup(repeat):
+    def run():
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout
+        return float(output.split()[-1])
+    return best_of(repeat, run)
+
+
+# ==================== SUITE ====================
+# name: (unit, True if higher is better)
+CASES = {
+    "update_low_fps": ("frames/s", True),
+    "update_high_fps": ("frames/s", True),
+    "draw_game_us": ("us", False),
+    "draw_heart_us": ("us", False),
+    "draw_bird_us": ("us", False),
+    **{f"add_score_{label}_us": ("us", False) for label in PLAYER_COUNTS},
+    **{f"top_scores_{label}_us": ("us", False) for label in PLAYER_COUNTS},
+    "startup_ms": ("ms", False),
+}
+
+
+def run_suite(only=None, repeat=5):
+    """Run every case whose name contains `only` and return {name: value}"""
+    def wanted(*names):
+        return any(only is None or only in name for name in names)
+
+    results = {}
+    if wanted("update_low_fps"):
+        # Short games, so the score stays below 15 and the difficulty low
+        results["update_low_fps"] = bench_update(False, 1000, 20, repeat)
+    if wanted("update_high_fps"):
+        results["update_high_fps"] = bench_update(True, 20000, 1, repeat)
+    if wanted("draw_game_us", "draw_heart_us", "draw_bird_us"):
+        results.update(bench_drawing(2000, repeat))
+    if wanted(*(n for n in CASES if n.startswith(("add_score", "top_scores")))):
+        results.update(bench_scores(repeat))
+    if wanted("startup_ms"):
+        results["startup_ms"] = bench_startup(repeat)
+    return {name: value for name, value in results.items() if wanted(name)}
+
+
+def compare(results, baseline, tolerance):
+    """Per-case change against the baseline; returns the regressed case names"""
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        unit, higher_is_better = CASES[name]
+        reference = baseline[name]
+        # Positive change means slower, whichever way the unit points
+        change = (reference / value - 1) if higher_is_better else (value / reference - 1)
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:>20}  {value:>12.2f} {unit:<8}  baseline {reference:>12.2f}  {change:+7.1%}  {flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flappy Penguin benchmarks")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case; the best counts")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression (default: 25%%)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.only, args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        baseline.setdefault("results", {}).update(results)
+        baseline.update(python=report["python"], platform=report["platform"])
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; record one with --save-baseline", file=sys.stderr)
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"FAILED: {len(regressions)} case(s) regressed more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    print("no regressions", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Background gameplay capture.
+
+FrameCapture copies each displayed frame out of the screen surface into a
+ring of buffers allocated up front, and a writer thread drains the ring to
+disk. The game loop's share is one memcpy of the surface's pixel buffer
+(Surface.get_buffer), about 60 us for the 500x600 window; it never waits
+for the writer. When the writer falls behind and every slot is full, the
+frame is dropped and counted instead.
+
+A capture is a directory holding
+
+    frames.raw         every written frame back to back, exactly as the
+                       surface stores it (raw format), or
+    frame_NNNNNN.png   one PNG per written frame (png format)
+    frames.csv         sequence number and seconds since the start of each
+                       written frame; gaps in the sequence are drops
+    capture.json       size, pixel layout and frame/drop counts, on close
+
+Raw frames are cheap enough to keep up at any frame rate (at 1.2 MB a
+frame, about 72 MB per second at 60 FPS) and can be turned into a video
+afterwards, for example
+
+    ffmpeg -f rawvideo -pixel_format bgr0 -video_size 500x600 -framerate 60 \\
+           -i capture/frames.raw capture.mp4
+
+(capture.json has the matching pixel_format). PNG encoding is slower and
+drops frames at full rate on slow machines, but needs no other tools.
+
+    python main.py --capture capture/
+    python main.py --capture capture/ --capture-format png
+"""
+import json
+import os
+import threading
+import time
+from array import array
+
+import pygame
+
+DEFAULT_SLOTS = 32  # Frames the writer may fall behind by; about half a second at 60 FPS
+FORMATS = ("raw", "png")
+
+
+def pixel_layout(surface):
+    """ffmpeg-style name of the surface's byte order, e.g. "bgr0" for 32-bit XRGB"""
+    names = dict(zip(surface.get_masks(), "rgba"))
+    layout = ""
+    for byte in range(surface.get_bytesize()):
+        layout += names.get(0xFF << (8 * byte), "0")
+    return layout
+
+
+class FrameCapture:
+    """Hands frames to a writer thread through a ring of preallocated buffers.
+
+    One thread captures and one writes. Slots between `_written` and
+    `_filled` (both only ever grow) hold frames waiting to be written; the
+    capturing side only touches the slot after them, so copying happens
+    outside the lock.
+    """
+
+    def __init__(self, directory, surface, format="raw", slots=DEFAULT_SLOTS):
+        if format not in FORMATS:
+            raise ValueError(f"unknown capture format {format!r}")
+        self.directory = directory
+        self.format = format
+        self.size = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.layout = pixel_layout(surface)
+        self.frame_bytes = self.pitch * self.size[1]
+
+        self.captured = 0  # Frames offered to capture()
+        self.written = 0
+        self.dropped = 0  # Skipped because the ring was full
+        self.failed = 0  # Lost to a write error; the first one stops all writing
+        self.last_error = None
+
+        # The ring: one buffer per slot, with the frame's sequence number and time
+        self._buffers = [memoryview(bytearray(self.frame_bytes)) for _ in range(slots)]
+        self._sequence = array('Q', bytes(8 * slots))
+        self._times = array('d', bytes(8 * slots))
+        self._filled = 0
+        self._written = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._canvas = None
+        if format == "png":
+            # Same pixel format as the screen, so a frame is copied in as is
+            self._canvas = pygame.Surface(self.size, 0, surface)
+            if self._canvas.get_pitch() != self.pitch:
+                raise ValueError("cannot build a PNG canvas matching the captured surface")
+        self._started = time.perf_counter()
+
+        os.makedirs(directory, exist_ok=True)
+        self._index = open(os.path.join(directory, "frames.csv"), 'w')
+        self._index.write("sequence,seconds\n")
+        self._raw = open(os.path.join(directory, "frames.raw"), 'wb') if format == "raw" else None
+        self._thread = threading.Thread(target=self._run, name="frame-capture", daemon=True)
+        self._thread.start()
+
+    def capture(self, surface):
+        """Queue the surface's current pixels; False if the frame had to be dropped"""
+        sequence = self.captured
+        self.captured += 1
+        slots = len(self._buffers)
+        filled = self._filled
+        if self.last_error is not None or filled - self._written >= slots:
+            self.dropped += 1
+            return False
+        slot = filled % slots
+        pixels = surface.get_buffer()
+        self._buffers[slot][:] = pixels
+        del pixels  # Unlocks the surface
+        self._sequence[slot] = sequence
+        self._times[slot] = time.perf_counter() - self._started
+        with self._cond:
+            self._filled = filled + 1
+            self._cond.notify()
+        return True
+
+    @property
+    def pending(self):
+        """Frames waiting for the writer"""
+        return self._filled - self._written
+
+    def close(self):
+        """Write what is queued, stop the thread and record the totals"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._index.close()
+        if self._raw is not None:
+            self._raw.close()
+        info = {
+            "format": self.format,
+            "width": self.size[0],
+            "height": self.size[1],
+            "pitch": self.pitch,
+            "pixel_format": self.layout,
+            "captured": self.captured,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "seconds": time.perf_counter() - self._started,
+        }
+        if self.last_error is not None:
+            info["error"] = str(self.last_error)
+        with open(os.path.join(self.directory, "capture.json"), 'w') as f:
+            json.dump(info, f, indent=2)
+            f.write("\n")
+
+    def summary(self):
+        text = f"{self.written} frames written to {self.directory}, {self.dropped} dropped"
+        if self.last_error is not None:
+            text += f", {self.failed} lost after a write error ({self.last_error})"
+        return text
+
+    # ---------- Writer thread ----------
+    def _run(self):
+        slots = len(self._buffers)
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._filled > self._written or self._closed)
+                if self._filled == self._written:
+                    break
+            slot = self._written % slots
+            if self.last_error is None:
+                try:
+                    self._write(slot)
+                    self.written += 1
+                except (OSError, pygame.error) as e:
+                    self.last_error = e
+            if self.last_error is not None:
+                self.failed += 1
+            with self._cond:
+                self._written += 1
+
+    def _write(self, slot):
+        sequence = self._sequence[slot]
+        if self._raw is not None:
+            self._raw.write(self._buffers[slot])
+        else:
+            pixels = self._canvas.get_buffer()
+            memoryview(pixels)[:] = self._buffers[slot]
+            del pixels  # The canvas has to be unlocked to be saved
+            pygame.image.save(self._canvas, os.path.join(self.directory, f"frame_{sequence:06d}.png"))
+        self._index.write(f"{sequence},{self._times[slot]:.6f}\n")
@@ -0,0 +1,302 @@
+"""Precomputed courses: every player faces the same pipes.
+
+A course is a fixed list of pipes - gap position and whether the pipe is
+one of the reversed ones - generated ahead of time from a seed. Setting
+game.course makes Game.spawn_pipe() take its pipes from the course in
+order instead of rolling them; the game still decides *when* to spawn
+(the cadence speeds up with the score) and still only flips pipes once
+the score reaches 15. After a crash the pipes that were on screen but not
+yet passed come round again, so the course is always flown in order. Past
+the last pipe the game falls back to its own RNG.
+
+On disk a course is
+
+    b"FPC", version byte, varint seed, varint pipe count
+    one little-endian uint16 per pipe: (gap_position - GAP_MIN) << 1 | reversed
+    the nominal spawn frames, delta-encoded as varints
+
+so 1000 pipes take about 3 KB. The spawn frames are the ones a player who
+clears every pipe would see, for tools that want the schedule without
+running the game. CourseReader streams the pipe records from the file a
+chunk at a time.
+
+    python course.py generate course.fpc --seed 42 --pipes 2000
+    python course.py daily courses/ --start 2026-01-01 --days 365
+    python course.py info courses/daily-2026-01-01.fpc
+    python main.py --course course.fpc
+"""
+import argparse
+import datetime
+import functools
+import os
+import random
+import struct
+
+import simulation
+from simulation import SCREEN_HEIGHT, PIPE_GAP
+from varint import read_varint, write_varint
+
+MAGIC = b"FPC"
+FORMAT_VERSION = 1
+GAP_MIN = 50
+GAP_MAX = SCREEN_HEIGHT - 50 - PIPE_GAP - 50  # Same range Pipe rolls from with the stock gap
+DEFAULT_PIPES = 1000
+READ_CHUNK = 256  # Pipes CourseReader reads at a time
+
+
+def daily_seed(day=None):
+    """Seed of the course for a calendar day (today by default)"""
+    day = day or datetime.date.today()
+    return random.Random(f"daily:{day.isoformat()}").getrandbits(63)
+
+
+def fits(physics):
+    """Whether courses can be played with `physics`.
+
+    Courses are rolled for the stock pipe gap; a taller gap would push the
+    lowest openings into the ground.
+    """
+    return physics.pipe_gap <= PIPE_GAP
+
+
+def _pack_pipe(gap_position, reversed_gap):
+    return (gap_position - GAP_MIN) << 1 | bool(reversed_gap)
+
+
+def _unpack_pipe(record):
+    return (record >> 1) + GAP_MIN, bool(record & 1)
+
+
+# ==================== COURSE ====================
+class Course:
+    """A whole course in memory"""
+
+    def __init__(self, seed, pipes, spawn_frames=()):
+        self.seed = seed
+        self.pipes = list(pipes)  # (gap_position, reversed_gap) pairs
+        self.spawn_frames = list(spawn_frames)
+        self.position = 0  # Next pipe handed out
+
+    @classmethod
+    def generate(cls, seed, count=DEFAULT_PIPES, physics=simulation.DEFAULT_PHYSICS):
+        """Roll `count` pipes from `seed`, physics.reversed_chance of them flipped"""
+        rng = random.Random(seed)
+        pipes = []
+        for _ in range(count):
+            reversed_gap = rng.random() < physics.reversed_chance
+            pipes.append((rng.randint(GAP_MIN, GAP_MAX), reversed_gap))
+        return cls(seed, pipes, nominal_spawn_frames(count))
+
+    @classmethod
+    def daily(cls, day=None, count=DEFAULT_PIPES, physics=simulation.DEFAULT_PHYSICS):
+        return cls.generate(daily_seed(day), count, physics)
+
+    def __len__(self):
+        return len(self.pipes)
+
+    # ---------- Game.course interface ----------
+    def rewind(self):
+        self.position = 0
+
+    def seek(self, position):
+        """Continue from pipe `position` (for Game.restore)"""
+        self.position = position
+
+    def next_pipe(self):
+        if self.position >= len(self.pipes):
+            return None
+        self.position += 1
+        return self.pipes[self.position - 1]
+
+    # ---------- Serialization ----------
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        out.append(FORMAT_VERSION)
+        write_varint(out, self.seed)
+        write_varint(out, len(self.pipes))
+        out += struct.pack(f"<{len(self.pipes)}H", *(_pack_pipe(g, r) for g, r in self.pipes))
+        previous = 0
+        for frame in self.spawn_frames:
+            write_varint(out, frame - previous)
+            previous = frame
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        seed, count, pos = _read_header(data)
+        end = pos + 2 * count
+        if len(data) < end:
+            raise ValueError("Truncated course")
+        pipes = [_unpack_pipe(r) for r in struct.unpack(f"<{count}H", data[pos:end])]
+        return cls(seed, pipes, _read_spawn_frames(data, end))
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def _read_header(data):
+    """seed, pipe count and the offset of the first pipe record"""
+    if data[:len(MAGIC)] != MAGIC or len(data) <= len(MAGIC) or data[len(MAGIC)] != FORMAT_VERSION:
+        raise ValueError("Not a course, or an unsupported course version")
+    seed, pos = read_varint(data, len(MAGIC) + 1, "course")
+    count, pos = read_varint(data, pos, "course")
+    return seed, count, pos
+
+
+def _read_spawn_frames(data, pos):
+    frames = []
+    frame = 0
+    while pos < len(data):
+        delta, pos = read_varint(data, pos, "course")
+        frame += delta
+        frames.append(frame)
+    return frames
+
+
+# ==================== STREAMING READER ====================
+class CourseReader:
+    """Feeds a game from a course file without loading all of it.
+
+    Pipe records are fixed-size, so the reader keeps the file open and
+    pulls in READ_CHUNK of them whenever it runs out.
+    """
+
+    def __init__(self, filename, chunk=READ_CHUNK):
+        self.filename = filename
+        self.chunk = chunk
+        self._file = open(filename, 'rb')
+        # Both varints fit in 20 bytes, plus magic and version
+        self.seed, self.count, self._start = _read_header(self._file.read(24))
+        self.rewind()
+
+    def __len__(self):
+        return self.count
+
+    def rewind(self):
+        self.seek(0)
+
+    def seek(self, position):
+        """Continue from pipe `position` (for Game.restore)"""
+        self.position = min(position, self.count)
+        self._buffer = ()
+        self._index = 0
+        self._file.seek(self._start + 2 * self.position)
+
+    def next_pipe(self):
+        if self.position >= self.count:
+            return None
+        if self._index >= len(self._buffer):
+            wanted = min(self.chunk, self.count - self.position)
+            data = self._file.read(2 * wanted)
+            if len(data) != 2 * wanted:
+                raise ValueError("Truncated course")
+            self._buffer = struct.unpack(f"<{wanted}H", data)
+            self._index = 0
+        record = self._buffer[self._index]
+        self._index += 1
+        self.position += 1
+        return _unpack_pipe(record)
+
+    def spawn_frames(self):
+        """The nominal schedule stored after the pipes"""
+        with open(self.filename, 'rb') as f:
+            f.seek(self._start + 2 * self.count)
+            return _read_spawn_frames(f.read(), 0)
+
+    def close(self):
+        self._file.close()
+
+
+# ==================== NOMINAL SCHEDULE ====================
+@functools.lru_cache(maxsize=8)
+def nominal_spawn_frames(count):
+    """Frames at which pipes 1..count spawn for a player who clears every one.
+
+    The cadence only depends on when pipes are passed, not on where their
+    gaps are, so this is the same for every course of a given length. It
+    is worked out by running the real game with the penguin placed in the
+    middle of the next opening every frame.
+    """
+    class Pipes:
+        """Endless course of centered pipes that counts what it hands out"""
+        position = 0
+
+        def rewind(self):
+            self.position = 0
+
+        def next_pipe(self):
+            self.position += 1
+            return (GAP_MIN + GAP_MAX) // 2, False
+
+    pipes = Pipes()
+    game = simulation.Game(0)
+    game.course = pipes
+    game.reset(0)
+    frames = []
+    while len(frames) < count:
+        simulation.hold_in_opening(game)
+        spawned = pipes.position
+        game.step()
+        if game.game_over:
+            raise RuntimeError("the autopilot crashed")
+        if pipes.position != spawned:
+            frames.append(game.frame)
+    return tuple(frames)
+
+
+# ==================== COMMAND LINE ====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and inspect precomputed courses")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write one course")
+    generate.add_argument("output")
+    generate.add_argument("--seed", type=int, help="default: a random seed")
+    generate.add_argument("--pipes", type=int, default=DEFAULT_PIPES)
+    generate.add_argument("--physics", metavar="FILE", help="JSON physics whose reversed_chance to use")
+
+    daily = commands.add_parser("daily", help="write daily-YYYY-MM-DD.fpc courses for a range of days")
+    daily.add_argument("directory")
+    daily.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                       help="first day, YYYY-MM-DD (default: today)")
+    daily.add_argument("--days", type=int, default=1)
+    daily.add_argument("--pipes", type=int, default=DEFAULT_PIPES)
+    daily.add_argument("--physics", metavar="FILE", help="JSON physics whose reversed_chance to use")
+
+    info = commands.add_parser("info", help="describe a course file")
+    info.add_argument("course")
+
+    args = parser.parse_args(argv)
+    physics = simulation.DEFAULT_PHYSICS
+    if getattr(args, "physics", None):
+        try:
+            physics = simulation.Physics.load(args.physics)
+        except (TypeError, ValueError) as e:
+            parser.error(f"{args.physics}: {e}")
+    if args.command == "generate":
+        seed = random.getrandbits(63) if args.seed is None else args.seed
+        Course.generate(seed, args.pipes, physics).save(args.output)
+        print(f"wrote {args.output} (seed {seed}, {args.pipes} pipes)")
+    elif args.command == "daily":
+        os.makedirs(args.directory, exist_ok=True)
+        for offset in range(args.days):
+            day = args.start + datetime.timedelta(days=offset)
+            Course.daily(day, args.pipes, physics).save(os.path.join(args.directory, f"daily-{day.isoformat()}.fpc"))
+        print(f"wrote {args.days} courses to {args.directory}")
+    else:
+        course = Course.load(args.course)
+        flipped = sum(r for _, r in course.pipes)
+        print(f"seed {course.seed}, {len(course)} pipes ({flipped} reversed after 15), "
+              f"{os.path.getsize(args.course)} bytes")
+        if course.spawn_frames:
+            print(f"last pipe spawns at frame {course.spawn_frames[-1]} for a flawless run")
+
+
+if __name__ == "__main__":
+    main()
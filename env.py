@@ -0,0 +1,192 @@
+"""Gym-style environments for training agents.
+
+FlappyEnv wraps one simulation.Game and VectorFlappyEnv steps many games
+per call on batch_sim.BatchGame. Both follow the classic Gym API without
+depending on it:
+
+    obs = env.reset(seed)
+    obs, reward, done, info = env.step(action)   # action: 1 = flap
+
+An episode is one full game (all of its lives). Observations are float32
+rows of OBSERVATION_FIELDS, in pixels and pixels per frame:
+
+    bird_y, bird_velocity, pipe_distance, gap_top, gap_bottom
+
+where the pipe is the nearest one not yet behind the bird and the gap is
+the space actually open to fly through. The reward is one per pipe passed
+plus `crash_reward` per life lost.
+
+Observations are written into buffers allocated once per environment, so
+the arrays returned by reset() and step() are overwritten by the next call;
+copy them to keep them.
+
+FlappyEnv(pixels=(width, height)) observes the playfield instead, drawn
+off-screen with the game's own sprites (no HUD) and downsampled to a
+(height, width, 3) uint8 array. That needs pygame; everything else only
+needs NumPy.
+"""
+import random
+
+import numpy as np
+
+import simulation
+from batch_sim import BatchGame, BIRD_X, BIRD_START_Y
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, PIPE_GAP
+from tournament import MAX_FRAMES, episode_seed
+
+OBSERVATION_FIELDS = ("bird_y", "bird_velocity", "pipe_distance", "gap_top", "gap_bottom")
+
+
+def next_opening(bird, pipes, gap=PIPE_GAP):
+    """(x, top, bottom) of the nearest pipe not yet behind the bird.
+
+    Matches BatchGame.next_pipe(): with no pipe ahead it is a pipe at the
+    right edge with a `gap` tall opening centered on the starting height.
+    """
+    ahead = simulation.pipe_ahead(bird, pipes)
+    if ahead is None:
+        top = BIRD_START_Y - gap // 2
+        return SCREEN_WIDTH, top, top + gap
+    top, bottom = ahead.opening()
+    return ahead.x, top, bottom
+
+
+# ==================== SINGLE ENVIRONMENT ====================
+class FlappyEnv:
+    """One game, stepped a frame per action"""
+
+    def __init__(self, lives=1, crash_reward=-1.0, max_frames=MAX_FRAMES, pixels=None):
+        self.lives = lives
+        self.crash_reward = crash_reward
+        self.max_frames = max_frames  # Episodes are cut off (done) after this many frames
+        self.pixels = pixels  # (width, height) for pixel observations, None for compact ones
+        if pixels is None:
+            self.game = simulation.Game()
+            self.observation = np.zeros(len(OBSERVATION_FIELDS), dtype=np.float32)
+        else:
+            import pygame
+            import main
+            from assets import sprites
+
+            self.game = main.Game()
+            self._sprites = sprites
+            self._canvas = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            self._small = pygame.Surface(pixels)
+            width, height = pixels
+            self.observation = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def reset(self, seed=None):
+        """Start a new episode and return its first observation"""
+        self.game.total_lives = self.lives
+        self.game.new_game(seed)
+        return self._observe()
+
+    def step(self, action):
+        """Play one frame, flapping first if `action` is truthy"""
+        game = self.game
+        score, lives = game.score, game.lives
+        game.step(bool(action))
+        reward = (game.score - score) + self.crash_reward * (lives - game.lives)
+        truncated = game.frame >= self.max_frames and not game.game_ended
+        done = game.game_ended or truncated
+        info = {"score": game.score, "lives": game.lives, "frame": game.frame, "truncated": truncated}
+        return self._observe(), reward, done, info
+
+    def _observe(self):
+        if self.pixels is not None:
+            return self._render()
+        bird = self.game.bird
+        x, top, bottom = next_opening(bird, self.game.pipes, self.game.physics.pipe_gap)
+        obs = self.observation
+        obs[0] = bird.y
+        obs[1] = bird.velocity
+        obs[2] = x - bird.x
+        obs[3] = top
+        obs[4] = bottom
+        return obs
+
+    def _render(self):
+        """Draw the playfield off-screen and downsample it into the observation"""
+        import pygame
+
+        game = self.game
+        self._canvas.blit(self._sprites.get("background", game.render_background), (0, 0))
+        for pipe in game.pipes:
+            pipe.draw(self._canvas)
+        game.bird.draw(self._canvas)
+        pygame.transform.smoothscale(self._canvas, self.pixels, self._small)
+        # surfarray is (width, height, 3); the observation is row-major
+        view = pygame.surfarray.pixels3d(self._small)
+        np.copyto(self.observation, view.transpose(1, 0, 2))
+        del view  # Unlocks the surface
+        return self.observation
+
+
+# ==================== VECTORIZED ENVIRONMENT ====================
+class VectorFlappyEnv:
+    """Many games stepped together, one row each.
+
+    Finished games restart straight away with the next seed in the
+    sequence started by reset(seed), so step() always returns live
+    observations; done[i] says row i's episode ended on that step, and
+    info["final_score"][i] holds the score it ended with.
+    """
+
+    def __init__(self, num_envs, lives=1, crash_reward=-1.0, max_frames=MAX_FRAMES):
+        self.num_envs = num_envs
+        self.crash_reward = crash_reward
+        self.max_frames = max_frames
+        self.batch = BatchGame([0] * num_envs, total_lives=lives)
+        self.base_seed = 0
+        self.episodes = 0  # Episodes started since reset(), for seeding
+
+        self.observation = np.zeros((num_envs, len(OBSERVATION_FIELDS)), dtype=np.float32)
+        self.reward = np.zeros(num_envs, dtype=np.float32)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.final_score = np.zeros(num_envs, dtype=np.int64)
+        self._score = np.zeros(num_envs, dtype=np.int64)
+        self._lives = np.zeros(num_envs, dtype=np.int64)
+
+    def reset(self, seed=None):
+        """Start every row on a new episode; seeds follow tournament.episode_seed(seed, n)"""
+        self.base_seed = random.getrandbits(63) if seed is None else seed
+        self.episodes = 0
+        self._restart(np.arange(self.num_envs))
+        return self._observe()
+
+    def _restart(self, rows):
+        seeds = [episode_seed(self.base_seed, self.episodes + k) for k in range(len(rows))]
+        self.episodes += len(rows)
+        self.batch.reset_games(rows, seeds)
+
+    def step(self, actions):
+        """Play one frame in every row; actions is a bool (or 0/1) array"""
+        batch = self.batch
+        np.copyto(self._score, batch.score)
+        np.copyto(self._lives, batch.lives)
+        batch.step(np.asarray(actions, dtype=bool))
+
+        np.subtract(batch.score, self._score, out=self.reward, casting="unsafe")
+        self.reward += self.crash_reward * (self._lives - batch.lives)
+        np.greater_equal(batch.frames, self.max_frames, out=self.truncated)
+        self.truncated &= ~batch.game_ended
+        np.logical_or(batch.game_ended, self.truncated, out=self.done)
+
+        finished = np.flatnonzero(self.done)
+        if len(finished):
+            self.final_score[finished] = batch.score[finished]
+            self._restart(finished)
+        info = {"final_score": self.final_score, "truncated": self.truncated}
+        return self._observe(), self.reward, self.done, info
+
+    def _observe(self):
+        batch = self.batch
+        x, top, bottom = batch.next_pipe()
+        obs = self.observation
+        obs[:, 0] = batch.bird_y
+        obs[:, 1] = batch.bird_velocity
+        obs[:, 2] = x - BIRD_X
+        obs[:, 3] = top
+        obs[:, 4] = bottom
+        return obs
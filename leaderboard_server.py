@@ -0,0 +1,235 @@
+"""Shared leaderboard service for every cabinet and browser build.
+
+A small asyncio HTTP/1.1 server (stdlib only) in front of the same
+Leaderboard index and crash-safe JSONScoreStore that ScoreManager uses:
+
+    POST /scores        {"name": ..., "score": ...} or a list of them
+                        -> {"accepted": n, "improved": [names]}
+    GET  /top?limit=k   -> [[name, score], ...], best first
+
+Submissions only touch memory. Writes are batched: a flusher task saves
+the latest snapshot at most every --flush-interval seconds, on a worker
+thread, so any number of submissions in between cost one write. Top-k
+responses are cached as encoded bytes until the board next changes.
+Connections are kept alive, and CORS headers let game.html / index.html
+post from any origin.
+
+    python leaderboard_server.py --port 8765 --scores leaderboard.json
+
+The game side is scores.RemoteLeaderboard (main.py --leaderboard URL);
+the browser builds use ?leaderboard=URL.
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from scores import JSONScoreStore, Leaderboard, valid_name, valid_score
+
+DEFAULT_PORT = 8765
+MAX_BODY = 64 * 1024
+MAX_LIMIT = 100
+STATUS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large"}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def parse_submissions(body):
+    """(name, score) pairs from a JSON object or list of objects"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise BadRequest("body is not JSON")
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        raise BadRequest("expected an object or a list of objects")
+    submissions = []
+    for item in data:
+        name = item.get("name") if isinstance(item, dict) else None
+        score = item.get("score") if isinstance(item, dict) else None
+        if not valid_name(name):
+            raise BadRequest("bad name: use 1-15 letters or digits")
+        if not valid_score(score):
+            raise BadRequest("bad score")
+        submissions.append((name, score))
+    return submissions
+
+
+class LeaderboardServer:
+    """Best score per player, shared over HTTP"""
+
+    def __init__(self, filename, flush_interval=1.0):
+        self.store = JSONScoreStore(filename)
+        self.board = Leaderboard(self.store.load())
+        self.flush_interval = flush_interval
+        self.version = 0  # Bumped on every change; the response cache is tied to it
+        self.saved_version = 0
+        self.writes = 0
+        self._cache = {}
+        self._cache_version = 0
+        self._changed = asyncio.Event()
+        self._server = None
+        self._flusher = None
+
+    # ---------- Board ----------
+    def submit(self, submissions):
+        """Apply (name, score) pairs; returns the names whose best improved"""
+        improved = []
+        for name, score in submissions:
+            old = self.board.scores.get(name)
+            if old is None or score > old:
+                self.board.update(name, score)
+                improved.append(name)
+        if improved:
+            self.version += 1
+            self._changed.set()
+        return improved
+
+    def top_response(self, limit):
+        """Encoded top-`limit` list, re-encoded only after the board changes"""
+        if self._cache_version != self.version:
+            self._cache.clear()
+            self._cache_version = self.version
+        body = self._cache.get(limit)
+        if body is None:
+            body = self._cache[limit] = json.dumps(self.board.top(limit)).encode()
+        return body
+
+    # ---------- Writes ----------
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            await self.flush(loop)
+            # Everything submitted while waiting here goes into the next write
+            await asyncio.sleep(self.flush_interval)
+
+    async def flush(self, loop=None):
+        """Write the current board if it changed since the last write"""
+        if self.saved_version == self.version:
+            return
+        loop = loop or asyncio.get_running_loop()
+        version, snapshot = self.version, dict(self.board.scores)
+        try:
+            await loop.run_in_executor(None, self.store.save, snapshot)
+        except OSError:
+            self._changed.set()  # Try again next round
+            return
+        self.saved_version = version
+        self.writes += 1
+
+    # ---------- HTTP ----------
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    self._respond(writer, 413, b'{"error": "body too large"}', close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = self.route(method, target, body)
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                self._respond(writer, status, payload, close)
+                await writer.drain()
+                if close:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method, target, body):
+        url = urlsplit(target)
+        if method == "OPTIONS":
+            return 204, b""
+        try:
+            if url.path == "/top":
+                if method != "GET":
+                    return 405, b'{"error": "use GET"}'
+                query = parse_qs(url.query)
+                try:
+                    limit = int(query.get("limit", ["5"])[0])
+                except ValueError:
+                    raise BadRequest("bad limit")
+                return 200, self.top_response(max(1, min(limit, MAX_LIMIT)))
+            if url.path == "/scores":
+                if method != "POST":
+                    return 405, b'{"error": "use POST"}'
+                submissions = parse_submissions(body)
+                improved = self.submit(submissions)
+                return 200, json.dumps({"accepted": len(submissions), "improved": improved}).encode()
+        except BadRequest as e:
+            return 400, json.dumps({"error": str(e)}).encode()
+        return 404, b'{"error": "not found"}'
+
+    @staticmethod
+    def _respond(writer, status, payload, close=False):
+        head = (
+            f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\n"
+            f"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+            f"Access-Control-Allow-Headers: Content-Type\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + payload)
+
+    # ---------- Lifecycle ----------
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self._server = await asyncio.start_server(self.handle, host, port)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        return self._server
+
+    async def stop(self):
+        """Stop accepting connections and write anything not yet saved"""
+        self._server.close()
+        await self._server.wait_closed()
+        self._flusher.cancel()
+        await self.flush()
+
+
+async def serve(args):
+    server = LeaderboardServer(args.scores, args.flush_interval)
+    listener = await server.start(args.host, args.port)
+    print(f"leaderboard on http://{args.host}:{listener.sockets[0].getsockname()[1]} "
+          f"({len(server.board)} players)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared leaderboard service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--scores", default="leaderboard.json", help="where the board is kept")
+    parser.add_argument("--flush-interval", type=float, default=1.0,
+                        help="seconds between writes of the board (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,18 @@
 import pygame
 import sys
-import random
+import argparse
 import json
+import math
 import os
+import struct
 
-# ==================== INITIALIZATION ====================
-pygame.init()
-
-# Screen dimensions
-SCREEN_WIDTH = 500
-SCREEN_HEIGHT = 600
-FPS = 60
+import simulation
+from assets import sprites, texts
+from profiler import FrameProfiler, NullProfiler
+from render import Compositor, DisplayUpdater
+from replay import Replay
+from scores import BackgroundWriter, RemoteLeaderboard, ScoreManager, atomic_write
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, FixedStepper, SnapshotRing
 
 # Colors
 WHITE = (255, 255, 255)
@@ -20,295 +22,219 @@ RED = (220, 20, 60)
 GREEN = (34, 139, 34)
 LIGHT_BLUE = (135, 206, 235)
 
-# Physics constants
-GRAVITY = 0.12
-FLAP_STRENGTH = -3.2
-PIPE_GAP = 160
-PIPE_WIDTH = 52
-PIPE_VELOCITY_START = -1.8
+# Sprite layout: where the bird's (x, y) sits inside the penguin sprite, and
+# the margin around hearts for the broken heart's X
+PENGUIN_SPRITE_SIZE = (32, 32)
+PENGUIN_ORIGIN = (0, 6)
+HEART_PADDING = 2
+
+# Opacity of ghost penguins (0-255)
+GHOST_ALPHA = 110
+
+# ==================== INITIALIZATION ====================
+# The window, clock and fonts only exist once init_display() has run, so
+# importing this module (or simulation.py) never opens a window.
+screen = None
+clock = None
+font_large = None
+font_medium = None
+font_small = None
+font_tiny = None
+
+
+def init_display():
+    """Bring up pygame, the window and the fonts"""
+    global screen, clock, font_large, font_medium, font_small, font_tiny
+    pygame.init()
+    sprites.clear()
+    texts.clear()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("FLAPPY PENGUIN - MASTER GAME")
+    clock = pygame.time.Clock()
+    font_large = pygame.font.Font(None, 72)
+    font_medium = pygame.font.Font(None, 48)
+    font_small = pygame.font.Font(None, 32)
+    font_tiny = pygame.font.Font(None, 24)
 
-# Create display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("FLAPPY PENGUIN - MASTER GAME")
-clock = pygame.time.Clock()
-font_large = pygame.font.Font(None, 72)
-font_medium = pygame.font.Font(None, 48)
-font_small = pygame.font.Font(None, 32)
-font_tiny = pygame.font.Font(None, 24)
 
 # Scores file
 SCORES_FILE = "highscores.json"
 
+# Replay of the most recent finished game (see replay.py)
+LAST_REPLAY_FILE = "last_replay.fpr"
 
-# ==================== SCORE MANAGEMENT ====================
-class ScoreManager:
-    """Manages high scores storage and retrieval"""
+# Scores waiting for the shared leaderboard (--leaderboard) when the game quit
+LEADERBOARD_SPOOL = "leaderboard_queue.json"
+
+# How much play --rewind keeps, and how far back one press goes (seconds)
+REWIND_SECONDS = 5
+REWIND_STEP = 1
+
+
+# ==================== CRASH RESUME ====================
+class ResumeFile:
+    """Latest game snapshot on disk for --resume.
+    
+    Written atomically by a scores.BackgroundWriter; saving empty data
+    removes the file, so a finished or properly quit game is not resumed.
+    """
     
     def __init__(self, filename):
         self.filename = filename
-        self.scores = self.load_scores()
     
-    def load_scores(self):
-        """Load scores from file"""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-    
-    def save_scores(self):
-        """Save scores to file"""
-        with open(self.filename, 'w') as f:
-            json.dump(self.scores, f, indent=2)
-    
-    def add_score(self, name, score):
-        """Add or update a player's score"""
-        if name not in self.scores or score > self.scores[name]:
-            self.scores[name] = score
-            self.save_scores()
-            return True
-        return False
-    
-    def get_top_scores(self, limit=5):
-        """Get top scores sorted"""
-        sorted_scores = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_scores[:limit]
+    def load(self):
+        try:
+            with open(self.filename, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def save(self, data):
+        if not data:
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            return
+        atomic_write(self.filename, data)
 
 
-score_manager = ScoreManager(SCORES_FILE)
+# ==================== SCORE MANAGEMENT ====================
+score_manager = None  # Created by main()
 
 
 # ==================== BIRD CLASS ====================
-class Bird:
-    """Handles bird object with gravity and flapping mechanics"""
-    
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.velocity = 0
-        self.width = 24
-        self.height = 20
-        self.alive = True
-    
-    def flap(self):
-        """Make the bird jump upward"""
-        self.velocity = FLAP_STRENGTH
-    
-    def update(self):
-        """Update bird position with gravity"""
-        self.velocity += GRAVITY
-        self.y += self.velocity
-        
-        # Check if bird hits ground or ceiling
-        if self.y + self.height >= SCREEN_HEIGHT - 50 or self.y <= 0:
-            self.alive = False
-    
-    def draw(self, surface):
-        """Draw the penguin"""
+class Bird(simulation.Bird):
+    """Penguin with its physics from simulation.Bird"""
+    
+    __slots__ = ()
+    
+    def draw(self, surface, alpha=1.0):
+        """Draw the penguin, `alpha` of the way from its last position to its current one"""
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        sprite = sprites.get("penguin", self.render_sprite)
+        return surface.blit(sprite, (self.x - PENGUIN_ORIGIN[0], y - PENGUIN_ORIGIN[1]))
+    
+    @staticmethod
+    def render_sprite():
+        """Rasterize the penguin once, with the bird's (x, y) at PENGUIN_ORIGIN"""
+        sprite = pygame.Surface(PENGUIN_SPRITE_SIZE, pygame.SRCALPHA)
+        x, y = PENGUIN_ORIGIN
+        
         # Penguin body (black)
-        pygame.draw.ellipse(surface, BLACK, (self.x + 5, self.y + 3, 24, 18))
+        pygame.draw.ellipse(sprite, BLACK, (x + 5, y + 3, 24, 18))
         
         # Penguin belly (white)
-        pygame.draw.ellipse(surface, WHITE, (self.x + 8, self.y + 6, 18, 12))
+        pygame.draw.ellipse(sprite, WHITE, (x + 8, y + 6, 18, 12))
         
         # Penguin head (black)
-        pygame.draw.circle(surface, BLACK, (self.x + 17, self.y + 2), 7)
+        pygame.draw.circle(sprite, BLACK, (x + 17, y + 2), 7)
         
         # Penguin eyes (white circles)
-        pygame.draw.circle(surface, WHITE, (self.x + 13, self.y), 3)
-        pygame.draw.circle(surface, WHITE, (self.x + 21, self.y), 3)
+        pygame.draw.circle(sprite, WHITE, (x + 13, y), 3)
+        pygame.draw.circle(sprite, WHITE, (x + 21, y), 3)
         
         # Penguin pupils (black)
-        pygame.draw.circle(surface, BLACK, (self.x + 13, self.y), 1)
-        pygame.draw.circle(surface, BLACK, (self.x + 21, self.y), 1)
+        pygame.draw.circle(sprite, BLACK, (x + 13, y), 1)
+        pygame.draw.circle(sprite, BLACK, (x + 21, y), 1)
         
         # Penguin beak (orange)
-        pygame.draw.polygon(surface, (255, 140, 0), [(self.x + 17, self.y + 4), (self.x + 20, self.y + 6), (self.x + 17, self.y + 8)])
+        pygame.draw.polygon(sprite, (255, 140, 0), [(x + 17, y + 4), (x + 20, y + 6), (x + 17, y + 8)])
         
         # Penguin feet (orange)
-        pygame.draw.line(surface, (255, 140, 0), (self.x + 12, self.y + 21), (self.x + 12, self.y + 24), 2)
-        pygame.draw.line(surface, (255, 140, 0), (self.x + 22, self.y + 21), (self.x + 22, self.y + 24), 2)
+        pygame.draw.line(sprite, (255, 140, 0), (x + 12, y + 21), (x + 12, y + 24), 2)
+        pygame.draw.line(sprite, (255, 140, 0), (x + 22, y + 21), (x + 22, y + 24), 2)
+        
+        return sprite
 
 
 # ==================== PIPE CLASS ====================
-class Pipe:
-    """Handles pipe objects that the bird must avoid"""
-    
-    def __init__(self, x, pipe_velocity, reversed_gap=False):
-        self.x = x
-        self.width = PIPE_WIDTH
-        self.gap = PIPE_GAP
-        self.pipe_velocity = pipe_velocity
-        self.reversed_gap = reversed_gap
-        
-        # Generate random gap position with guaranteed passable space
-        # The gap is always PIPE_GAP pixels tall
-        # Calculate valid range for gap start position
-        min_gap_pos = 50
-        max_gap_pos = SCREEN_HEIGHT - 50 - self.gap - 50
-        gap_position = random.randint(min_gap_pos, max_gap_pos)
-        
-        if reversed_gap:
-            # Reversed: larger portion on top, smaller on bottom (inverted pattern)
-            # Create gap from bottom up
-            self.bottom_pipe_height = gap_position
-            self.gap_start = gap_position
-            self.gap_end = gap_position + self.gap
-            self.top_pipe_height = SCREEN_HEIGHT - 50 - self.gap_end
-        else:
-            # Normal: smaller portion on top, larger on bottom
-            # Create gap in the middle
-            self.top_pipe_height = gap_position
-            self.gap_start = gap_position
-            self.gap_end = gap_position + self.gap
-            self.bottom_pipe_height = SCREEN_HEIGHT - 50 - self.gap_end
-        
-        self.scored = False  # Track if player has passed this pipe
-    
-    def update(self):
-        """Move pipe to the left"""
-        self.x += self.pipe_velocity
-    
-    def draw(self, surface):
-        """Draw top and bottom pipes with guaranteed gap"""
-        if self.reversed_gap:
-            # Reversed: bottom pipe, gap, top pipe
-            # Draw bottom pipe
-            pygame.draw.rect(surface, GREEN, (self.x, SCREEN_HEIGHT - 50 - self.bottom_pipe_height, self.width, self.bottom_pipe_height))
-            pygame.draw.rect(surface, (0, 100, 0), (self.x, SCREEN_HEIGHT - 50 - self.bottom_pipe_height, self.width, self.bottom_pipe_height), 3)
-            
-            # Draw top pipe
-            pygame.draw.rect(surface, GREEN, (self.x, 0, self.width, self.top_pipe_height))
-            pygame.draw.rect(surface, (0, 100, 0), (self.x, 0, self.width, self.top_pipe_height), 3)
-        else:
-            # Normal: top pipe, gap, bottom pipe
-            # Draw top pipe
-            pygame.draw.rect(surface, GREEN, (self.x, 0, self.width, self.top_pipe_height))
-            pygame.draw.rect(surface, (0, 100, 0), (self.x, 0, self.width, self.top_pipe_height), 3)
-            
-            # Draw bottom pipe
-            pygame.draw.rect(surface, GREEN, (self.x, self.gap_end, self.width, self.bottom_pipe_height))
-            pygame.draw.rect(surface, (0, 100, 0), (self.x, self.gap_end, self.width, self.bottom_pipe_height), 3)
-    
-    def off_screen(self):
-        """Check if pipe is off the left side of screen"""
-        return self.x + self.width < 0
-    
-    def check_collision(self, bird):
-        """Check if bird collides with pipe - improved accuracy"""
-        # Make collision box tighter around the actual penguin sprite
-        bird_rect = pygame.Rect(bird.x + 5, bird.y + 2, 20, 20)
-        
-        # Create pipe collision rectangles
-        if self.reversed_gap:
-            # Reversed: top and bottom portions
-            top_pipe_rect = pygame.Rect(self.x, 0, self.width, self.top_pipe_height)
-            bottom_pipe_rect = pygame.Rect(self.x, SCREEN_HEIGHT - 50 - self.bottom_pipe_height, self.width, self.bottom_pipe_height)
-        else:
-            # Normal: top and bottom portions
-            top_pipe_rect = pygame.Rect(self.x, 0, self.width, self.top_pipe_height)
-            bottom_pipe_rect = pygame.Rect(self.x, self.gap_end, self.width, self.bottom_pipe_height)
-        
-        # Check collision
-        if bird_rect.colliderect(top_pipe_rect) or bird_rect.colliderect(bottom_pipe_rect):
-            return True
-        return False
+class Pipe(simulation.Pipe):
+    """Pipe pair with its physics from simulation.Pipe"""
+    
+    __slots__ = ()
+    
+    def draw(self, surface, alpha=1.0):
+        """Draw top and bottom pipes with guaranteed gap, interpolated like Bird.draw"""
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        
+        # Draw top pipe
+        top = sprites.get(("pipe", self.width, self.top_pipe_height), lambda: self.render_body(self.width, self.top_pipe_height))
+        top_rect = surface.blit(top, (x, 0))
+        
+        # Draw bottom pipe
+        bottom = sprites.get(("pipe", self.width, self.bottom_pipe_height), lambda: self.render_body(self.width, self.bottom_pipe_height))
+        bottom_rect = surface.blit(bottom, (x, self.bottom_y))
+        return [top_rect, bottom_rect]
+    
+    @staticmethod
+    def render_body(width, height):
+        """Rasterize one pipe body with its outline"""
+        body = pygame.Surface((width, max(height, 0)))
+        body.fill(GREEN)
+        pygame.draw.rect(body, (0, 100, 0), (0, 0, width, height), 3)
+        return body
 
 
 # ==================== GAME CLASS ====================
-class Game:
+class Game(simulation.Game):
     """Main game class to manage game state"""
     
-    def __init__(self):
+    bird_class = Bird
+    pipe_class = Pipe
+    
+    def __init__(self, physics=None):
         self.player_name = ""
-        self.lives = 3
-        self.total_lives = 3
-        self.game_ended = False
-        self.heart_break_animation = False
-        self.heart_break_timer = 0
         self.is_high_score = False  # Track if this is a high score
-        self.celebration_counter = 0  # Animation counter for celebration
-        self.reset()
+        self.celebration_counter = 0  # Animation clock for celebration, in FPS frames of wall-clock time
+        self.hud_drawn = None  # Score, name and lives the HUD last showed
+        super().__init__(physics=physics)
     
-    def reset(self):
+    def reset(self, seed=None):
         """Reset game to initial state"""
-        self.bird = Bird(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2)
-        self.pipes = []
-        self.score = 0
-        self.game_over = False
-        self.game_started = False
-        self.pipe_velocity = PIPE_VELOCITY_START
-        self.pipe_spawn_timer = 0
-        self.pipe_spawn_interval = 100  # Frames between pipe spawns
-    
-    def spawn_pipe(self):
-        """Create a new pipe"""
-        # Use reversed gap (more challenging) after 15 points
-        reversed_gap = self.score >= 15 and random.random() < 0.6  # 60% chance of reversed pipes after 15
-        pipe = Pipe(SCREEN_WIDTH, self.pipe_velocity, reversed_gap=reversed_gap)
-        self.pipes.append(pipe)
-    
-    def live_lost(self):
-        """Handle when a live is lost - with heart break animation"""
-        self.lives -= 1
-        self.heart_break_animation = True
-        self.heart_break_timer = 30  # Animation frames
-        if self.lives <= 0:
-            self.game_ended = True
-    
-    def update(self):
-        """Update game state"""
-        if not self.game_started or self.game_over:
-            return
-        
-        # Update bird
-        self.bird.update()
-        
-        # Check if bird is alive
-        if not self.bird.alive:
-            self.game_over = True
-            self.live_lost()
-        
-        # Spawn pipes
-        self.pipe_spawn_timer += 1
-        if self.pipe_spawn_timer >= self.pipe_spawn_interval:
-            self.spawn_pipe()
-            self.pipe_spawn_timer = 0
+        super().reset(seed)
+        self.result_committed = False
+        self.final_top_scores = []  # Leaderboard as it stood when this game ended
+    
+    def new_game(self, seed=None):
+        """Start over with a full set of lives"""
+        super().new_game(seed)
+        self.is_high_score = False
+    
+    def snapshot_extra(self):
+        """Player and end-of-game details for snapshots"""
+        return json.dumps([self.player_name, self.is_high_score, self.celebration_counter,
+                           self.result_committed, self.final_top_scores]).encode()
+    
+    def restore_extra(self, data):
+        if data:
+            (self.player_name, self.is_high_score, self.celebration_counter,
+             self.result_committed, top_scores) = json.loads(data)
+            self.final_top_scores = [tuple(entry) for entry in top_scores]
+        self.hud_drawn = None
+    
+    def commit_result(self, scores, duration):
+        """Record the finished game, once, and snapshot what the end screens show.
         
-        # Update pipes
-        for pipe in self.pipes:
-            pipe.update()
-            
-            # Check collision
-            if pipe.check_collision(self.bird):
-                self.game_over = True
-                self.live_lost()
-            
-            # Check if bird passed pipe
-            if not pipe.scored and pipe.x + pipe.width < self.bird.x:
-                pipe.scored = True
-                self.score += 1
-                
-                # Increase difficulty
-                if self.score < 15:
-                    # Normal difficulty before 15 points
-                    self.pipe_velocity -= 0.08
-                else:
-                    # MUCH TOUGHER difficulty after 15 points
-                    # Significantly increase speed
-                    self.pipe_velocity -= 0.25
-                    
-                    # Aggressively increase spawn rate for extra challenge
-                    if self.pipe_spawn_interval > 60:
-                        self.pipe_spawn_interval -= 2
-        
-        # Remove off-screen pipes
-        self.pipes = [p for p in self.pipes if not p.off_screen()]
+        Called when the last life is lost; the game over and celebration
+        screens only read what this stores.
+        """
+        if self.result_committed:
+            return
+        self.result_committed = True
+        self.is_high_score = scores.add_score(self.player_name, self.score)
+        scores.record_game(self.player_name, self.score, self.lives_used, duration)
+        self.final_top_scores = scores.get_top_scores(3)
     
     def draw_heart(self, surface, x, y, size=30, is_broken=False):
         """Draw a pixel art heart shape like retro games"""
+        sprite = sprites.get(("heart", size, is_broken), lambda: self.render_heart(size, is_broken))
+        return surface.blit(sprite, (x - HEART_PADDING, y - HEART_PADDING))
+    
+    @staticmethod
+    def render_heart(size, is_broken):
+        """Rasterize one heart, padded so the broken heart's X fits"""
+        sprite = pygame.Surface((size + 2 * HEART_PADDING, size + 2 * HEART_PADDING), pygame.SRCALPHA)
+        x = y = HEART_PADDING
+        
         # Pixel size for the heart
         pix = size // 8
         
@@ -357,71 +283,124 @@ class Game:
             # Draw broken heart (X pattern)
             # Draw black outline
             for px, py in heart_pixels_black:
-                pygame.draw.rect(surface, (100, 100, 100), (x + px * pix, y + py * pix, pix, pix))
+                pygame.draw.rect(sprite, (100, 100, 100), (x + px * pix, y + py * pix, pix, pix))
             
             # Draw gray fill for broken look
             for px, py in heart_pixels_red:
-                pygame.draw.rect(surface, (128, 128, 128), (x + px * pix, y + py * pix, pix, pix))
+                pygame.draw.rect(sprite, (128, 128, 128), (x + px * pix, y + py * pix, pix, pix))
             
             # Draw X pattern
             line_width = 3
             heart_center_x = x + size // 2
             heart_center_y = y + size // 2
-            pygame.draw.line(surface, RED, (x, y), (x + size, y + size), line_width)
-            pygame.draw.line(surface, RED, (x + size, y), (x, y + size), line_width)
+            pygame.draw.line(sprite, RED, (x, y), (x + size, y + size), line_width)
+            pygame.draw.line(sprite, RED, (x + size, y), (x, y + size), line_width)
         else:
             # Draw normal heart
             # Draw black outline
             for px, py in heart_pixels_black:
-                pygame.draw.rect(surface, (0, 0, 0), (x + px * pix, y + py * pix, pix, pix))
+                pygame.draw.rect(sprite, (0, 0, 0), (x + px * pix, y + py * pix, pix, pix))
             
             # Draw red fill
             for px, py in heart_pixels_red:
-                pygame.draw.rect(surface, RED, (x + px * pix, y + py * pix, pix, pix))
+                pygame.draw.rect(sprite, RED, (x + px * pix, y + py * pix, pix, pix))
             
             # Draw white cross
             for px, py in heart_pixels_white:
-                pygame.draw.rect(surface, WHITE, (x + px * pix, y + py * pix, pix, pix))
+                pygame.draw.rect(sprite, WHITE, (x + px * pix, y + py * pix, pix, pix))
+        
+        return sprite
+    
+    def draw_ghosts(self, surface, alpha=1.0):
+        """Draw every live ghost with one blits() call; returns the rect they cover"""
+        sprite = sprites.get("ghost", self.render_ghost)
+        left = self.bird.x - PENGUIN_ORIGIN[0]
+        top = PENGUIN_ORIGIN[1]
+        rects = surface.blits([(sprite, (left, g.prev_y + (g.y - g.prev_y) * alpha - top))
+                               for g in self.ghosts if g.alive])
+        return [rects[0].unionall(rects)] if rects else []
     
-    def draw(self, surface):
-        """Draw all game elements"""
+    @staticmethod
+    def render_ghost():
+        """The penguin sprite, see-through"""
+        ghost = Bird.render_sprite()
+        ghost.fill((255, 255, 255, GHOST_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
+        return ghost
+    
+    @staticmethod
+    def render_background():
+        """Rasterize the sky and ground layer once"""
+        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        
         # Background
-        surface.fill(LIGHT_BLUE)
+        background.fill(LIGHT_BLUE)
         
         # Ground
-        pygame.draw.rect(surface, (139, 69, 19), (0, SCREEN_HEIGHT - 50, SCREEN_WIDTH, 50))
-        pygame.draw.line(surface, BLACK, (0, SCREEN_HEIGHT - 50), (SCREEN_WIDTH, SCREEN_HEIGHT - 50), 2)
+        pygame.draw.rect(background, (139, 69, 19), (0, SCREEN_HEIGHT - 50, SCREEN_WIDTH, 50))
+        pygame.draw.line(background, BLACK, (0, SCREEN_HEIGHT - 50), (SCREEN_WIDTH, SCREEN_HEIGHT - 50), 2)
+        return background
+    
+    @staticmethod
+    def render_overlay():
+        """Semi-transparent black layer for the game over screen"""
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        overlay.set_alpha(180)
+        overlay.fill(BLACK)
+        return overlay
+    
+    def draw(self, surface, alpha=1.0):
+        """Draw all game elements, returning the rects that may have changed.
+        
+        `alpha` is how far the frame is between the last two simulation
+        steps (see simulation.FixedStepper).
+        """
+        # Background and ground, pre-rendered as one layer
+        surface.blit(sprites.get("background", self.render_background), (0, 0))
         
         # Draw pipes
+        dirty = []
         for pipe in self.pipes:
-            pipe.draw(surface)
+            dirty += pipe.draw(surface, alpha)
+        
+        # Ghosts under the player's penguin
+        if self.ghosts:
+            dirty += self.draw_ghosts(surface, alpha)
         
         # Draw bird
-        self.bird.draw(surface)
+        dirty.append(self.bird.draw(surface, alpha))
+        
+        # HUD only counts as changed when what it shows has changed
+        hud = (self.score, self.player_name, self.lives)
+        hud_changed = hud != self.hud_drawn
+        self.hud_drawn = hud
         
         # Draw score
-        score_text = font_medium.render(str(self.score), True, BLACK)
-        surface.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, 20))
+        score_text = texts.render(font_medium, str(self.score), True, BLACK)
+        hud_rects = [surface.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, 20))]
         
         # Draw player name (moved lower to avoid overlapping the centered score)
-        name_text = font_small.render(f"Player: {self.player_name}", True, BLACK)
-        surface.blit(name_text, (10, 60))
+        name_text = texts.render(font_small, f"Player: {self.player_name}", True, BLACK)
+        hud_rects.append(surface.blit(name_text, (10, 60)))
         
         # Draw lives as hearts
         for i in range(self.total_lives):
             is_broken = i >= self.lives
-            self.draw_heart(surface, SCREEN_WIDTH - 50 - (i * 40), 40, 30, is_broken=is_broken)
+            hud_rects.append(self.draw_heart(surface, SCREEN_WIDTH - 50 - (i * 40), 40, 30, is_broken=is_broken))
+        
+        if hud_changed:
+            dirty += hud_rects
+        return dirty
     
     def draw_name_input_screen(self, surface, input_text, cursor_visible):
-        """Draw name input screen"""
+        """Draw name input screen, returning the input box (the only part that changes)"""
         surface.fill(LIGHT_BLUE)
         
         # Title
-        title = font_large.render("PENGUIN-RUSH", True, RED)
+        title = texts.render(font_large, "PENGUIN-RUSH", True, RED)
         surface.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 50))
         
         # Instructions
-        instructions = font_medium.render("Enter Your Name:", True, BLACK)
+        instructions = texts.render(font_medium, "Enter Your Name:", True, BLACK)
         surface.blit(instructions, (SCREEN_WIDTH // 2 - instructions.get_width() // 2, 150))
         
         # Input box
@@ -430,7 +409,7 @@ class Game:
         pygame.draw.rect(surface, BLACK, input_box, 3)
         
         # Input text
-        text_surf = font_medium.render(input_text, True, BLACK)
+        text_surf = texts.render(font_medium, input_text, True, BLACK)
         surface.blit(text_surf, (input_box.x + 10, input_box.y + 10))
         
         # Cursor
@@ -439,40 +418,40 @@ class Game:
             pygame.draw.line(surface, BLACK, (cursor_x, input_box.y + 5), (cursor_x, input_box.y + 45), 2)
         
         # Instructions
-        hint = font_small.render("Press ENTER to continue", True, (100, 100, 100))
+        hint = texts.render(font_small, "Press ENTER to continue", True, (100, 100, 100))
         surface.blit(hint, (SCREEN_WIDTH // 2 - hint.get_width() // 2, 350))
         
-        pygame.display.flip()
+        return [input_box]
     
     def draw_start_screen(self, surface):
         """Draw start screen with instructions and high scores"""
         surface.fill(LIGHT_BLUE)
         
         # Title
-        title = font_large.render("PENGUIN-RUSH", True, RED)
+        title = texts.render(font_large, "PENGUIN-RUSH", True, RED)
         surface.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 20))
         
         # Welcome message
-        welcome = font_small.render(f"Welcome, {self.player_name}!", True, BLACK)
+        welcome = texts.render(font_small, f"Welcome, {self.player_name}!", True, BLACK)
         surface.blit(welcome, (SCREEN_WIDTH // 2 - welcome.get_width() // 2, 90))
         
         # High scores
-        scores_text = font_medium.render("HIGH SCORES", True, RED)
+        scores_text = texts.render(font_medium, "HIGH SCORES", True, RED)
         surface.blit(scores_text, (SCREEN_WIDTH // 2 - scores_text.get_width() // 2, 140))
         
         top_scores = score_manager.get_top_scores(5)
         y = 190
         if top_scores:
             for i, (name, score) in enumerate(top_scores, 1):
-                score_line = font_tiny.render(f"{i}. {name}: {score}", True, BLACK)
+                score_line = texts.render(font_tiny, f"{i}. {name}: {score}", True, BLACK)
                 surface.blit(score_line, (SCREEN_WIDTH // 2 - score_line.get_width() // 2, y))
                 y += 30
         else:
-            no_scores = font_tiny.render("No scores yet!", True, BLACK)
+            no_scores = texts.render(font_tiny, "No scores yet!", True, BLACK)
             surface.blit(no_scores, (SCREEN_WIDTH // 2 - no_scores.get_width() // 2, y))
         
         # Start instructions
-        start_text = font_small.render("PRESS SPACE TO START", True, RED)
+        start_text = texts.render(font_small, "PRESS SPACE TO START", True, RED)
         surface.blit(start_text, (SCREEN_WIDTH // 2 - start_text.get_width() // 2, 480))
         
         # Other controls
@@ -482,47 +461,50 @@ class Game:
         ]
         y = 520
         for control in controls:
-            ctrl_text = font_tiny.render(control, True, BLACK)
+            ctrl_text = texts.render(font_tiny, control, True, BLACK)
             surface.blit(ctrl_text, (SCREEN_WIDTH // 2 - ctrl_text.get_width() // 2, y))
             y += 25
-        
-        pygame.display.flip()
     
-    def draw_game_over_screen(self, surface):
-        """Draw game over screen with final score"""
+    def draw_overlay(self, surface):
+        """Darken whatever is on the surface"""
+        surface.blit(sprites.get("overlay", self.render_overlay), (0, 0))
+    
+    def draw_game_over_screen(self, surface, overlay=True):
+        """Draw game over screen with final score.
+        
+        Pass overlay=False when the surface already holds a darkened frame.
+        """
         # Semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(BLACK)
-        surface.blit(overlay, (0, 0))
+        if overlay:
+            self.draw_overlay(surface)
         
         # Game Over text
-        game_over_text = font_large.render("GAME OVER", True, RED)
+        game_over_text = texts.render(font_large, "GAME OVER", True, RED)
         surface.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 30))
         
         # Player name
-        player_text = font_medium.render(f"Player: {self.player_name}", True, WHITE)
+        player_text = texts.render(font_medium, f"Player: {self.player_name}", True, WHITE)
         surface.blit(player_text, (SCREEN_WIDTH // 2 - player_text.get_width() // 2, 100))
         
         # Final score
-        score_text = font_medium.render(f"SCORE: {self.score}", True, WHITE)
+        score_text = texts.render(font_medium, f"SCORE: {self.score}", True, WHITE)
         surface.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, 155))
         
         # Show remaining lives or game ended
         if not self.game_ended:
             # Show lives lost and remaining lives as numbers
             lives_lost_count = self.total_lives - self.lives
-            broken_text = font_small.render(f"Lives Lost: {lives_lost_count}", True, WHITE)
+            broken_text = texts.render(font_small, f"Lives Lost: {lives_lost_count}", True, WHITE)
             surface.blit(broken_text, (SCREEN_WIDTH // 2 - broken_text.get_width() // 2, 220))
             
-            remaining_text = font_small.render(f"Lives Left: {self.lives}", True, YELLOW)
+            remaining_text = texts.render(font_small, f"Lives Left: {self.lives}", True, YELLOW)
             surface.blit(remaining_text, (SCREEN_WIDTH // 2 - remaining_text.get_width() // 2, 280))
             
-            continue_text = font_small.render("Press SPACE to Continue", True, RED)
+            continue_text = texts.render(font_small, "Press SPACE to Continue", True, RED)
             surface.blit(continue_text, (SCREEN_WIDTH // 2 - continue_text.get_width() // 2, 340))
         else:
             # Game completely ended - show all hearts broken
-            all_broken_text = font_small.render("All Lives Lost!", True, RED)
+            all_broken_text = texts.render(font_small, "All Lives Lost!", True, RED)
             surface.blit(all_broken_text, (SCREEN_WIDTH // 2 - all_broken_text.get_width() // 2, 220))
             
             # Show all broken hearts
@@ -530,99 +512,210 @@ class Game:
                 self.draw_heart(surface, SCREEN_WIDTH // 2 - 80 + (i * 50), 270, 30, is_broken=True)
             
             # High scores section
-            high_scores_label = font_medium.render("HIGH SCORES", True, YELLOW)
+            high_scores_label = texts.render(font_medium, "HIGH SCORES", True, YELLOW)
             surface.blit(high_scores_label, (SCREEN_WIDTH // 2 - high_scores_label.get_width() // 2, 340))
             
-            # Check if new high score and update
-            self.is_high_score = score_manager.add_score(self.player_name, self.score)
+            # New high score (decided once, by commit_result)
             if self.is_high_score and self.score > 0:
-                high_score_text = font_small.render("NEW HIGH SCORE!", True, YELLOW)
+                high_score_text = texts.render(font_small, "NEW HIGH SCORE!", True, YELLOW)
                 surface.blit(high_score_text, (SCREEN_WIDTH // 2 - high_score_text.get_width() // 2, 390))
                 y_offset = 430
             else:
                 y_offset = 390
             
             # Show last high scores
-            top_scores = score_manager.get_top_scores(3)
-            for i, (name, score) in enumerate(top_scores):
-                score_line = font_tiny.render(f"{i+1}. {name}: {score}", True, WHITE)
+            for i, (name, score) in enumerate(self.final_top_scores):
+                score_line = texts.render(font_tiny, f"{i+1}. {name}: {score}", True, WHITE)
                 surface.blit(score_line, (SCREEN_WIDTH // 2 - score_line.get_width() // 2, y_offset + (i * 25)))
             
-            restart_text = font_small.render("Press R to Restart", True, YELLOW)
+            restart_text = texts.render(font_small, "Press R to Restart", True, YELLOW)
             surface.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, 480))
         
-        esc_text = font_small.render("Press ESC to Menu", True, YELLOW)
+        esc_text = texts.render(font_small, "Press ESC to Menu", True, YELLOW)
         surface.blit(esc_text, (SCREEN_WIDTH // 2 - esc_text.get_width() // 2, 550))
     
     def draw_celebration_screen(self, surface):
-        """Draw celebration screen for new high score"""
+        """Draw celebration screen for new high score, returning the rects that animate"""
         # Animated background
         surface.fill(LIGHT_BLUE)
         
         # Draw "CONGRATULATIONS" text
-        congrats_text = font_large.render("CONGRATULATIONS!", True, RED)
+        congrats_text = texts.render(font_large, "CONGRATULATIONS!", True, RED)
         surface.blit(congrats_text, (SCREEN_WIDTH // 2 - congrats_text.get_width() // 2, 50))
         
         # Draw celebration message
-        celebration_msg = font_medium.render("NEW HIGH SCORE!", True, YELLOW)
+        celebration_msg = texts.render(font_medium, "NEW HIGH SCORE!", True, YELLOW)
         surface.blit(celebration_msg, (SCREEN_WIDTH // 2 - celebration_msg.get_width() // 2, 130))
         
         # Player name in red to highlight high score achiever
-        player_text = font_medium.render(f"Player: {self.player_name}", True, RED)
+        player_text = texts.render(font_medium, f"Player: {self.player_name}", True, RED)
         surface.blit(player_text, (SCREEN_WIDTH // 2 - player_text.get_width() // 2, 200))
         
         # Achieved score in big text
-        score_display = font_large.render(str(self.score), True, RED)
+        score_display = texts.render(font_large, str(self.score), True, RED)
         surface.blit(score_display, (SCREEN_WIDTH // 2 - score_display.get_width() // 2, 260))
         
         # Achievement message
-        achievement_text = font_small.render("Amazing Performance!", True, BLACK)
+        achievement_text = texts.render(font_small, "Amazing Performance!", True, BLACK)
         surface.blit(achievement_text, (SCREEN_WIDTH // 2 - achievement_text.get_width() // 2, 350))
         
         # Animated pulse text
-        import math
-        pulse_size = int(5 * math.sin(self.celebration_counter * 0.1))
-        pulse_text = font_small.render("Press SPACE to Continue", True, RED)
+        pulse_size = self.celebration_pulse()
+        pulse_text = texts.render(font_small, "Press SPACE to Continue", True, RED)
         surface.blit(pulse_text, (SCREEN_WIDTH // 2 - pulse_text.get_width() // 2, 420 + pulse_size))
         
         # Draw top scores
-        top_scores_text = font_small.render("YOUR TOP SCORES", True, BLACK)
+        top_scores_text = texts.render(font_small, "YOUR TOP SCORES", True, BLACK)
         surface.blit(top_scores_text, (SCREEN_WIDTH // 2 - top_scores_text.get_width() // 2, 480))
         
-        top_scores = score_manager.get_top_scores(3)
         y = 510
-        for i, (name, score) in enumerate(top_scores, 1):
+        for i, (name, score) in enumerate(self.final_top_scores, 1):
             medal = "[1]" if i == 1 else "[2]" if i == 2 else "[3]"
-            score_line = font_tiny.render(f"{medal} {i}. {name}: {score}", True, BLACK)
+            score_line = texts.render(font_tiny, f"{medal} {i}. {name}: {score}", True, BLACK)
             surface.blit(score_line, (SCREEN_WIDTH // 2 - score_line.get_width() // 2, y))
             y += 25
         
-        pygame.display.flip()
+        # Only the pulsing line moves
+        return [pygame.Rect(0, 410, SCREEN_WIDTH, 45)]
+    
+    def celebration_pulse(self):
+        """Vertical offset of the pulsing "Press SPACE" line"""
+        return int(5 * math.sin(self.celebration_counter * 0.1))
 
 
 # ==================== MAIN GAME LOOP ====================
-def main():
+def main(argv=None):
     """Main game loop"""
-    game = Game()
+    global score_manager
+    parser = argparse.ArgumentParser(description="Flappy Penguin")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only update changed parts of the window, and skip redrawing static screens")
+    parser.add_argument("--sim-rate", type=float, default=FPS,
+                        help="simulation steps per second; the game runs faster or slower than normal "
+                             "at anything but %(default)s (default: %(default)s)")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help="frame rate cap for drawing (default: %(default)s)")
+    parser.add_argument("--uncapped", action="store_true",
+                        help="draw as fast as the hardware allows")
+    parser.add_argument("--history", metavar="DATABASE",
+                        help="also keep every finished game in this SQLite database")
+    parser.add_argument("--leaderboard", metavar="URL",
+                        help="share scores through a leaderboard_server.py, e.g. http://localhost:8765")
+    parser.add_argument("--profile", nargs="?", const="frame_trace.csv", metavar="TRACE",
+                        help="show frame timings and write a per-frame trace (.csv or .json) on exit")
+    parser.add_argument("--rewind", action="store_true",
+                        help=f"keep the last {REWIND_SECONDS} s of play; BACKSPACE jumps back {REWIND_STEP} s")
+    parser.add_argument("--resume", metavar="FILE",
+                        help="keep the running game in FILE and pick it up again after a crash")
+    parser.add_argument("--ghosts", type=int, default=0, metavar="N",
+                        help="fly N bot penguins alongside the player")
+    parser.add_argument("--ghost-replay", action="append", default=[], metavar="REPLAY",
+                        help="fly a ghost that repeats a replay's flaps (may be repeated)")
+    course_group = parser.add_mutually_exclusive_group()
+    course_group.add_argument("--course", metavar="FILE",
+                              help="play the pipes of a precomputed course (see course.py)")
+    course_group.add_argument("--daily", action="store_true",
+                              help="play today's course")
+    parser.add_argument("--physics", metavar="FILE",
+                        help="play with the physics settings in a JSON file (see sweep.py)")
+    parser.add_argument("--capture", metavar="DIR",
+                        help="record every displayed frame into DIR on a background thread (see capture.py)")
+    parser.add_argument("--capture-format", choices=("raw", "png"), default="raw",
+                        help="raw frames in one file, or one PNG per frame (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        physics = simulation.Physics.load(args.physics) if args.physics else None
+    except (TypeError, ValueError) as e:
+        parser.error(f"{args.physics}: {e}")
+    if physics is not None and (args.course or args.daily):
+        import course
+        if not course.fits(physics):
+            parser.error(f"courses are rolled for pipe gaps up to {simulation.PIPE_GAP}, not {physics.pipe_gap}")
+    
+    init_display()
+    if score_manager is None:
+        history = None
+        if args.history:
+            from score_db import ScoreHistory
+            history = ScoreHistory(args.history)
+        remote = RemoteLeaderboard(args.leaderboard, spool=LEADERBOARD_SPOOL) if args.leaderboard else None
+        score_manager = ScoreManager(SCORES_FILE, history=history, remote=remote)
+    
+    game = Game(physics)
+    if args.course or args.daily:
+        import course
+        game.course = course.CourseReader(args.course) if args.course else course.Course.daily(physics=game.physics)
+    if args.ghosts or args.ghost_replay:
+        import functools
+        from tournament import follow_gap
+        for i in range(args.ghosts):
+            # Spread the bots' aim so they do not all fly as one
+            game.add_ghost(policy=functools.partial(follow_gap, margin=-30 + 80 * i / max(args.ghosts - 1, 1)))
+        for filename in args.ghost_replay:
+            game.add_ghost(flaps=Replay.load(filename).flap_frames)
     running = True
     state = "name_input"  # States: name_input, start_screen, playing, game_over, celebration
     input_text = ""
     cursor_blink = 0
+    display = DisplayUpdater(dirty_rects=args.dirty_rects)
+    layers = Compositor((SCREEN_WIDTH, SCREEN_HEIGHT))
+    shown_state = None
+    stepper = FixedStepper(args.sim_rate)
+    rewind = SnapshotRing(REWIND_SECONDS, args.sim_rate) if args.rewind else None
+    
+    # Pick up where a crashed session left off
+    resume = resume_writer = None
+    steps_since_resume = 0
+    if args.resume:
+        resume = ResumeFile(args.resume)
+        saved = resume.load()
+        if saved:
+            try:
+                state = game.restore(saved)
+            except (ValueError, struct.error):
+                pass
+            else:
+                # Wait for SPACE instead of dropping the player straight back in
+                game.game_started = False
+        resume_writer = BackgroundWriter(resume)
+    
+    if args.profile:
+        profiler = FrameProfiler(budget=1 / args.fps)
+        profiler.instrument(Bird, "draw")
+        profiler.instrument(Pipe, "draw")
+        profiler.instrument(Game, "draw_heart", "Game.draw_heart")
+        profiler.instrument(texts, "render", "text")
+    else:
+        profiler = NullProfiler()
+    
+    recorder = None
+    if args.capture:
+        from capture import FrameCapture
+        recorder = FrameCapture(args.capture, screen, args.capture_format)
     
     while running:
-        clock.tick(FPS)
+        profiler.begin_frame()
+        
+        # Physics runs in fixed steps; drawing happens as often as allowed
+        elapsed = clock.tick(0 if args.uncapped else args.fps) / 1000
+        profiler.mark("wait")
+        steps = stepper.advance(elapsed)
+        # Animations run on wall-clock time, counted in FPS frames, whatever the sim rate
         cursor_visible = (cursor_blink // 10) % 2 == 0
-        cursor_blink += 1
+        cursor_blink += elapsed * FPS
         
         # Animate celebration
         if state == "celebration":
-            game.celebration_counter += 1
+            game.celebration_counter += elapsed * FPS
         
         # Handle events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                display.invalidate()
+            
             if event.type == pygame.KEYDOWN:
                 # Name input state
                 if state == "name_input":
@@ -640,7 +733,13 @@ def main():
                 # Start screen state
                 elif state == "start_screen":
                     if event.key == pygame.K_SPACE:
-                        game.reset()
+                        if game.game_ended:
+                            # Back from a finished game: start with full lives
+                            game.new_game()
+                        else:
+                            game.reset()
+                        if rewind is not None:
+                            rewind.clear()
                         state = "playing"
                     elif event.key == pygame.K_r:
                         state = "name_input"
@@ -651,24 +750,23 @@ def main():
                 # Playing state
                 elif state == "playing":
                     if game.game_started and not game.game_over and event.key == pygame.K_SPACE:
-                        game.bird.flap()
+                        game.flap()
                     elif not game.game_started and event.key == pygame.K_SPACE:
                         game.game_started = True
+                    elif rewind is not None and event.key == pygame.K_BACKSPACE and rewind.count:
+                        state = game.restore(rewind.back(int(REWIND_STEP * args.sim_rate)))
                 
                 # Game over state
                 elif state == "game_over":
                     if event.key == pygame.K_SPACE and not game.game_ended:
                         # Continue with another life
-                        game.bird = Bird(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2)
-                        game.pipes = []
-                        game.game_over = False
-                        game.game_started = False
+                        game.continue_round()
                         state = "playing"
+                    elif rewind is not None and event.key == pygame.K_BACKSPACE and not game.game_ended and rewind.count:
+                        # Undo the crash
+                        state = game.restore(rewind.back(int(REWIND_STEP * args.sim_rate)))
                     elif event.key == pygame.K_r and game.game_ended:
-                        game.lives = 3
-                        game.game_ended = False
-                        game.is_high_score = False
-                        game.reset()
+                        game.new_game()
                         state = "start_screen"
                     elif event.key == pygame.K_ESCAPE:
                         state = "start_screen"
@@ -676,40 +774,106 @@ def main():
                 # Celebration state
                 elif state == "celebration":
                     if event.key == pygame.K_SPACE:
-                        game.lives = 3
-                        game.game_ended = False
-                        game.is_high_score = False
-                        game.reset()
+                        game.new_game()
                         state = "start_screen"
                     elif event.key == pygame.K_ESCAPE:
                         state = "start_screen"
         
+        profiler.mark("events")
+        
         # Update game
-        game.update()
+        for _ in range(steps):
+            game.update()
+            if rewind is not None and game.game_started and not game.game_over:
+                rewind.push(game.snapshot(state))
+        profiler.mark("update")
         
         # Check if game is over
         if game.game_over and state == "playing":
             state = "game_over"
+            if game.game_ended:
+                game.commit_result(score_manager, game.frame / args.sim_rate)
+                if game.course is None and game.physics == simulation.DEFAULT_PHYSICS:
+                    # Replays rebuild the game from the seed with the stock physics;
+                    # a course or other physics would play back differently
+                    Replay.from_game(game).save(LAST_REPLAY_FILE)
+                if resume_writer:
+                    resume_writer.submit(b"")  # Nothing left to resume
+        
+        # Keep the game in progress on disk about once a second
+        if resume_writer and state in ("playing", "game_over") and not game.game_ended:
+            steps_since_resume += steps
+            if steps_since_resume >= args.sim_rate:
+                steps_since_resume = 0
+                resume_writer.submit(game.snapshot(state, flaps=True))
         
         # Check if should show celebration
         if state == "game_over" and game.game_ended and game.is_high_score:
             state = "celebration"
         
         # Draw
+        if state != shown_state:
+            display.invalidate()
+            shown_state = state
+            
+            # The last gameplay frame stays frozen under the game over text
+            if state == "game_over":
+                layers.freeze(lambda layer: (game.draw(layer), game.draw_overlay(layer)))
+            else:
+                layers.thaw()
+        
+        # What each screen shows; None means it changes every frame
         if state == "name_input":
-            game.draw_name_input_screen(screen, input_text, cursor_visible)
+            key = (input_text, cursor_visible)
         elif state == "start_screen":
-            game.draw_start_screen(screen)
+            # The board can change under the menu when --leaderboard refreshes it
+            key = (game.player_name, tuple(score_manager.get_top_scores(5)))
         elif state == "playing":
-            game.draw(screen)
-            pygame.display.flip()
+            key = None if game.game_started else (game.score, game.lives)
         elif state == "game_over":
-            game.draw(screen)
-            game.draw_game_over_screen(screen)
-            pygame.display.flip()
-        elif state == "celebration":
-            game.draw_celebration_screen(screen)
+            key = (game.game_ended, game.is_high_score)
+        else:
+            key = game.celebration_pulse()
+        
+        if display.needs_redraw(key):
+            if state == "name_input":
+                rects = game.draw_name_input_screen(screen, input_text, cursor_visible)
+            elif state == "start_screen":
+                game.draw_start_screen(screen)
+                rects = None
+            elif state == "playing":
+                rects = game.draw(screen, stepper.alpha)
+            elif state == "game_over":
+                layers.blit_frozen(screen)
+                game.draw_game_over_screen(screen, overlay=False)
+                rects = None
+            elif state == "celebration":
+                rects = game.draw_celebration_screen(screen)
+            profiler.mark("draw_" + state)
+            
+            overlay = profiler.draw_overlay(screen, font_tiny)
+            if overlay and rects is not None:
+                rects.append(overlay)
+            display.present(key, rects)
+            profiler.mark("present")
+        
+        # Static screens skip drawing but still count as shown frames
+        if recorder:
+            recorder.capture(screen)
+            profiler.mark("capture")
+    
+    profiler.uninstrument()
+    if args.profile:
+        profiler.export(args.profile)
     
+    if recorder:
+        recorder.close()
+        print(recorder.summary())
+    if resume_writer:
+        # Quitting on purpose is not a crash
+        resume_writer.close()
+        resume.save(b"")
+    score_manager.close()
     pygame.quit()
     sys.exit()
 
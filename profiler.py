@@ -0,0 +1,167 @@
+"""Opt-in frame-time profiler.
+
+FrameProfiler splits each frame into phases with lap-style marks, times
+individual routines by wrapping them with instrument(), keeps a per-frame
+trace, draws a small live overlay (p50/p99 frame time, dropped frames) and
+writes the trace to CSV or JSON. NullProfiler has the same interface and
+does nothing, so the game loop can call it unconditionally.
+
+    python main.py --profile                 # trace to frame_trace.csv
+    python main.py --profile trace.json
+"""
+import collections
+import csv
+import functools
+import json
+import time
+
+import pygame
+
+OVERLAY_REFRESH = 30  # Frames between overlay text updates
+
+
+class FrameProfiler:
+    """Per-frame phase and routine timings"""
+
+    def __init__(self, budget, window=600, max_frames=216000):
+        self.budget = budget  # Seconds a frame may take at the target rate
+        self.window = window  # Frames the live percentiles cover
+        self.max_frames = max_frames  # Trace length kept for export (an hour at 60 FPS)
+        self.frames = []
+        self.recent = collections.deque(maxlen=window)  # Live window, kept after the trace is full
+        self.columns = []
+        self.dropped = 0
+        self.frame_count = 0
+        self._current = {}
+        self._frame_start = None
+        self._lap = None
+        self._overlay = None
+        self._instrumented = []
+
+    # ---------- Measuring ----------
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._finish_frame(now)
+        self._frame_start = self._lap = now
+        self._current = {}
+
+    def mark(self, phase):
+        """Charge the time since the previous mark to `phase`"""
+        now = time.perf_counter()
+        self._add(phase, now - self._lap)
+        self._lap = now
+
+    def _add(self, name, seconds):
+        if name not in self._current and name not in self.columns:
+            self.columns.append(name)
+        self._current[name] = self._current.get(name, 0.0) + seconds * 1000
+
+    def _finish_frame(self, now):
+        frame_time = now - self._frame_start
+        self.frame_count += 1
+        if frame_time > self.budget * 1.5:
+            self.dropped += 1
+        record = self._current
+        record["frame"] = frame_time * 1000
+        self.recent.append(record)
+        if len(self.frames) < self.max_frames:
+            self.frames.append(record)
+
+    def instrument(self, owner, attr, name=None):
+        """Time every call to owner.attr (a class or an instance) as `name`"""
+        original = getattr(owner, attr)
+        name = name or f"{getattr(owner, '__name__', type(owner).__name__)}.{attr}"
+        profiler = self
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                profiler._add(name, time.perf_counter() - started)
+
+        # Keep whatever was set on the owner itself so uninstrument() can restore it
+        self._instrumented.append((owner, attr, owner.__dict__.get(attr)))
+        setattr(owner, attr, timed)
+
+    def uninstrument(self):
+        """Put every instrumented routine back"""
+        for owner, attr, original in reversed(self._instrumented):
+            if original is None:
+                delattr(owner, attr)
+            else:
+                setattr(owner, attr, original)
+        self._instrumented = []
+
+    # ---------- Reporting ----------
+    def percentile(self, q, name="frame"):
+        """q-th percentile (0-100) of `name` over the live window, in ms"""
+        values = sorted(f[name] for f in self.recent if name in f)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+    def summary(self):
+        return {
+            "frames": self.frame_count,
+            "dropped": self.dropped,
+            "budget_ms": self.budget * 1000,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+        }
+
+    def draw_overlay(self, surface, font):
+        """Draw the live stats in the top-left corner and return their rect"""
+        if self._overlay is None or self.frame_count % OVERLAY_REFRESH == 0:
+            stats = self.summary()
+            lines = [
+                f"p50 {stats['p50_ms']:.1f} ms  p99 {stats['p99_ms']:.1f} ms",
+                f"dropped {stats['dropped']} / {stats['frames']}",
+            ]
+            rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+            width = max(r.get_width() for r in rendered) + 8
+            height = sum(r.get_height() for r in rendered) + 8
+            self._overlay = pygame.Surface((width, height))
+            self._overlay.set_alpha(200)
+            y = 4
+            for r in rendered:
+                self._overlay.blit(r, (4, y))
+                y += r.get_height()
+        return surface.blit(self._overlay, (4, 4))
+
+    def export(self, filename):
+        """Write the per-frame trace; JSON if the name ends in .json, else CSV"""
+        columns = ["frame"] + self.columns
+        if filename.endswith(".json"):
+            with open(filename, 'w') as f:
+                json.dump({"summary": self.summary(), "columns": columns, "frames": self.frames}, f)
+            return
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["index"] + columns)
+            for i, record in enumerate(self.frames):
+                writer.writerow([i] + [f"{record.get(c, 0.0):.4f}" for c in columns])
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off"""
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def instrument(self, owner, attr, name=None):
+        pass
+
+    def uninstrument(self):
+        pass
+
+    def draw_overlay(self, surface, font):
+        return None
+
+    def export(self, filename):
+        pass
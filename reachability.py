@@ -0,0 +1,221 @@
+"""Which pipe sequences can actually be flown?
+
+Pipe only keeps each gap on screen; whether the penguin can get from one
+gap to the next depends on gravity, flap strength and how fast the pipes
+come. This works it out with a discretized dynamic program over the
+penguin's (y, velocity) state, frame by frame.
+
+Velocity is set to FLAP_STRENGTH on every flap and then only gains
+GRAVITY per frame, so a state is (y at the last flap, frames since it):
+after k frames the penguin is OFFSETS[k] below where it flapped, moving at
+FLAP_STRENGTH + k * GRAVITY. For each k the reachable flap heights are a
+bitset (a Python int, one bit per pixel), so a whole frame is a few
+shifts and masks per k. Flap heights are rounded to whole pixels when a
+flap happens, which is the only approximation besides treating the
+ceiling as y >= 0.
+
+The pipes' horizontal motion does not depend on the penguin, so a
+course's timeline - which y range is open on each frame - is built once by
+running the real game with the penguin held in each opening, and the DP
+then runs along it. The open-range masks are cached per (range, k).
+
+    python reachability.py --courses 200            # impossible courses per difficulty
+    python reachability.py --courses 50 --pipes 120 --workers 4
+
+Game.gap_filter = SpawnChecker() makes the spawner re-roll gaps that no
+play could reach, at a few milliseconds per spawned pipe. It is off by
+default: accepted gaps use the same draws as before, but every re-roll
+changes the rest of the seed's pipes, so replays of such runs need it on
+to play back.
+
+The flap arcs are worked out once for the stock GRAVITY and FLAP_STRENGTH;
+games with other values for those are refused rather than misjudged. Pipe
+gaps and speeds come from the game itself, so the rest of its physics can
+be anything.
+"""
+import argparse
+import functools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import simulation
+from simulation import SCREEN_HEIGHT, SCREEN_WIDTH, GRAVITY, FLAP_STRENGTH
+
+MAX_K = 130  # Frames since the last flap after which the penguin has hit the ground anyway
+OFFSETS = [k * FLAP_STRENGTH + GRAVITY * k * (k + 1) / 2 for k in range(MAX_K + 1)]
+SHIFTS = [round(offset) for offset in OFFSETS]
+BIAS = 1100  # Bit index of flap height 0; flap heights run from about -1050 to SCREEN_HEIGHT
+GROUND = SCREEN_HEIGHT - 50 - 20  # Lowest y the penguin's 20 px body survives at
+BIRD_LEFT = SCREEN_WIDTH // 4 + 5  # Collision box, as in Pipe.check_collision
+BIRD_SIZE = 20
+START_K = 27  # Frames since a flap at which velocity is closest to the starting 0
+LEVEL_SIZE = 15  # Points per difficulty level in the batch report
+
+
+@functools.lru_cache(maxsize=65536)
+def window(low, high, k):
+    """Bitset of flap heights from which y is in [low, high) k frames later"""
+    first = max(-BIAS, math.ceil(low - OFFSETS[k]))
+    last = math.ceil(high - OFFSETS[k]) - 1
+    if last < first:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << (first + BIAS)
+
+
+def start_states(low=0, high=GROUND):
+    """Every state with y in [low, high), at any point of a flap arc"""
+    return [window(low, high, k) if k else 0 for k in range(MAX_K + 1)]
+
+
+def advance(states, low, high):
+    """States one frame later, with or without a flap, that end in [low, high)"""
+    new = [0] * (MAX_K + 1)
+    flapped = 0
+    for k, bits in enumerate(states):
+        if not bits:
+            continue
+        shift = SHIFTS[k]
+        flapped |= bits << shift if shift >= 0 else bits >> -shift
+        if k < MAX_K:
+            new[k + 1] = bits & window(low, high, k + 1)
+    new[1] |= flapped & window(low, high, 1)
+    return new
+
+
+def check_physics(physics):
+    """Refuse physics whose flap arcs differ from the precomputed OFFSETS"""
+    if physics.gravity != GRAVITY or physics.flap_strength != FLAP_STRENGTH:
+        raise ValueError(f"reachability needs gravity {GRAVITY} and flap strength {FLAP_STRENGTH}, "
+                         f"not {physics.gravity} and {physics.flap_strength}")
+
+
+def open_range(pipes):
+    """[low, high) of y the penguin can be at this frame without crashing"""
+    low, high = 0, GROUND
+    for pipe in pipes:
+        left = int(pipe.x)
+        if BIRD_LEFT < left + pipe.width and BIRD_LEFT + BIRD_SIZE > left:
+            # int(y + 2) must clear the top pipe and keep 20 px above the bottom one
+            low = max(low, pipe.top_pipe_height - 2)
+            high = min(high, pipe.bottom_y - BIRD_SIZE - 1)
+    return low, high
+
+
+# ==================== WHOLE COURSES ====================
+def course_timeline(game, pipes):
+    """Open range and score on each frame until `pipes` pipes have been passed.
+
+    Steps `game` (a fresh, seeded simulation.Game) with the penguin placed
+    in the middle of the next opening, so it survives and the score - and
+    with it the pipe speed and spawn rate - ramps as for a flawless run.
+    """
+    check_physics(game.physics)
+    timeline = []
+    game.game_started = True
+    while game.score < pipes:
+        simulation.hold_in_opening(game)
+        game.update()
+        if game.game_over:
+            raise RuntimeError("the autopilot crashed")
+        timeline.append((open_range(game.pipes), game.score))
+    return timeline
+
+
+def first_impossible(timeline):
+    """Score at which every possible play has crashed, or None if one survives"""
+    states = [0] * (MAX_K + 1)
+    states[START_K] = 1 << (round(SCREEN_HEIGHT // 2 - OFFSETS[START_K]) + BIAS)
+    for (low, high), score in timeline:
+        states = advance(states, low, high)
+        if not any(states):
+            return score
+    return None
+
+
+def analyze_seed(seed, pipes):
+    """Score at which the course of simulation.Game(seed) becomes impossible, or None"""
+    return first_impossible(course_timeline(simulation.Game(seed), pipes))
+
+
+def _analyze_chunk(seeds, pipes):
+    return [analyze_seed(seed, pipes) for seed in seeds]
+
+
+def impossible_by_level(results, pipes):
+    """{level: (courses reaching it, of which impossible within it)}"""
+    levels = {}
+    for level in range(0, pipes, LEVEL_SIZE):
+        reached = [r for r in results if r is None or r >= level]
+        failed = [r for r in reached if r is not None and r < level + LEVEL_SIZE]
+        levels[level] = (len(reached), len(failed))
+    return levels
+
+
+# ==================== SPAWN-TIME CHECK ====================
+class SpawnChecker:
+    """Game.gap_filter that rejects gaps no play could reach.
+
+    Runs the DP from every state the open range allows right now, through
+    the frames until the candidate pipe has passed the penguin, with the
+    pipes already on screen and the candidate moving at their own speeds.
+    That over-approximates what the player can do, so only gaps that are
+    unreachable whatever happened before are rejected.
+    """
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected = 0
+
+    def __call__(self, game, gap_position, reversed_gap):
+        check_physics(game.physics)
+        candidate = simulation.Pipe(SCREEN_WIDTH, game.pipe_velocity, reversed_gap, gap_position=gap_position,
+                                    gap=game.physics.pipe_gap)
+        pipes = [candidate] + [p for p in game.pipes if p.x + p.width >= BIRD_LEFT]
+        positions = [p.x for p in pipes]
+        states = start_states(*open_range(pipes))
+        self.checked += 1
+        try:
+            while candidate.x + candidate.width >= BIRD_LEFT:
+                for pipe in pipes:
+                    pipe.x += pipe.pipe_velocity
+                states = advance(states, *open_range(pipes))
+                if not any(states):
+                    self.rejected += 1
+                    return False
+            return True
+        finally:
+            for pipe, x in zip(pipes, positions):
+                pipe.x = x
+
+
+# ==================== COMMAND LINE ====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fraction of impossible courses per difficulty level")
+    parser.add_argument("--courses", type=int, default=200, help="seeded courses to analyze")
+    parser.add_argument("--pipes", type=int, default=90, help="pipes per course")
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    from tournament import episode_seed
+
+    seeds = [episode_seed(args.base_seed, i) for i in range(args.courses)]
+    workers = args.workers or os.cpu_count() or 1
+    if workers == 1:
+        results = _analyze_chunk(seeds, args.pipes)
+    else:
+        chunks = [seeds[i:i + 8] for i in range(0, len(seeds), 8)]
+        with ProcessPoolExecutor(workers) as pool:
+            results = [r for chunk in pool.map(_analyze_chunk, chunks, [args.pipes] * len(chunks)) for r in chunk]
+
+    print(f"{'score':>9}  {'courses':>7}  {'impossible':>10}")
+    for level, (reached, failed) in impossible_by_level(results, args.pipes).items():
+        share = failed / reached if reached else 0.0
+        print(f"{level:>3}-{level + LEVEL_SIZE - 1:<5}  {reached:>7}  {failed:>4} {share:>6.1%}")
+    winnable = sum(r is None for r in results)
+    print(f"\n{winnable} of {len(results)} courses can be flown to {args.pipes} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Composing frames and getting them from the screen surface onto the window.
+
+By default every frame is pushed with pygame.display.flip(), as the game
+always did. In dirty-rectangle mode DisplayUpdater only pushes the regions
+that changed since the last frame, and lets static screens skip drawing
+altogether while the thing they show is unchanged.
+
+Compositor keeps layers that stay put for a whole screen, such as the
+frozen gameplay frame under the game over text.
+"""
+import pygame
+
+
+class DisplayUpdater:
+    """Decides what to redraw and how much of the window to update.
+
+    Each frame the caller describes what it is about to show with a key
+    (None for "always changing"). needs_redraw(key) is False when that exact
+    frame is already on screen. present(key, rects) then pushes either the
+    whole surface or just `rects` plus the previous frame's rects, so things
+    that moved are erased from where they were.
+    """
+
+    def __init__(self, dirty_rects=False):
+        self.dirty_rects = dirty_rects
+        self._last_key = None
+        self._previous = []
+        self._full = True
+
+    def invalidate(self):
+        """Push the whole surface next frame (state change, window exposed...)"""
+        self._full = True
+        self._last_key = None
+
+    def needs_redraw(self, key):
+        """Whether the frame described by key has to be drawn at all"""
+        if not self.dirty_rects or self._full:
+            return True
+        return key is None or key != self._last_key
+
+    def present(self, key=None, rects=None):
+        """Show the frame just drawn; rects=None means the whole surface changed"""
+        if not self.dirty_rects or self._full or rects is None:
+            pygame.display.flip()
+            self._full = False
+        else:
+            pygame.display.update(self._previous + rects)
+        self._previous = list(rects) if rects else []
+        self._last_key = key
+
+
+class Compositor:
+    """Cached full-screen layers.
+
+    freeze(draw) renders draw(surface) once into an off-screen layer that is
+    allocated on first use and reused afterwards; blit_frozen() puts it back
+    each frame until thaw().
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._layer = None
+        self.frozen = False
+
+    def freeze(self, draw):
+        """Render draw(layer) into the frozen layer"""
+        if self._layer is None:
+            self._layer = pygame.Surface(self.size)
+            if pygame.display.get_surface() is not None:
+                self._layer = self._layer.convert()
+        draw(self._layer)
+        self.frozen = True
+
+    def thaw(self):
+        """Stop showing the frozen layer (the surface is kept for next time)"""
+        self.frozen = False
+
+    def blit_frozen(self, surface):
+        return surface.blit(self._layer, (0, 0))
@@ -0,0 +1,136 @@
+"""Compact replays: a run is its seed plus the frames the player flapped on.
+
+Every simulation.Game run owns an RNG seeded from game.seed, so the seed and
+game.flap_frames are enough to re-simulate the whole run. On disk a replay is
+a version byte, the starting lives, the seed and the delta-encoded flap
+frames as varints - a few dozen bytes for a typical game.
+
+    python replay.py last_replay.fpr          # re-simulate and print the result
+    python replay.py last_replay.fpr --watch  # play it back in a window
+"""
+import argparse
+import time
+
+import simulation
+from varint import read_varint, write_varint
+
+FORMAT_VERSION = 1
+
+
+# ==================== REPLAY ====================
+class Replay:
+    """Seed and flap frames of one run"""
+
+    def __init__(self, seed, flap_frames, lives=3):
+        if not 0 <= lives <= 255:
+            raise ValueError(f"Replays store 0-255 starting lives, not {lives}")
+        self.seed = seed
+        self.flap_frames = list(flap_frames)
+        self.lives = lives
+
+    @classmethod
+    def from_game(cls, game):
+        """Capture the run a Game is currently playing (or just finished)"""
+        # A run started with no lives left ends on its first crash however
+        # far below zero the count is, so those all replay as 0
+        return cls(game.seed, game.flap_frames, max(game.start_lives, 0))
+
+    def to_bytes(self):
+        out = bytearray([FORMAT_VERSION, self.lives])
+        write_varint(out, self.seed)
+        write_varint(out, len(self.flap_frames))
+        previous = 0
+        for frame in self.flap_frames:
+            write_varint(out, frame - previous)
+            previous = frame
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data or data[0] != FORMAT_VERSION:
+            raise ValueError("Not a replay, or an unsupported replay version")
+        lives = data[1]
+        seed, pos = read_varint(data, 2, "replay")
+        count, pos = read_varint(data, pos, "replay")
+        frames = []
+        frame = 0
+        for _ in range(count):
+            delta, pos = read_varint(data, pos, "replay")
+            frame += delta
+            frames.append(frame)
+        return cls(seed, frames, lives)
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def new_game(self, game_class=simulation.Game):
+        """A game set up to start this run"""
+        game = game_class()
+        game.lives = self.lives
+        game.reset(self.seed)
+        return game
+
+    def inputs(self):
+        """Flap frames as a set, for O(1) lookups while stepping"""
+        return frozenset(self.flap_frames)
+
+
+# ==================== PLAYBACK ====================
+def simulate(replay, max_frames=1000000):
+    """Re-simulate a replay headlessly and return the finished Game"""
+    game = replay.new_game()
+    flaps = replay.inputs()
+    for _ in range(max_frames):
+        if game.game_ended:
+            break
+        game.step(game.frame in flaps)
+    return game
+
+
+def watch(replay):
+    """Play a replay back in a window at normal speed"""
+    import pygame
+    import main
+
+    main.init_display()
+    game = replay.new_game(main.Game)
+    game.player_name = "Replay"
+    flaps = replay.inputs()
+    while not game.game_ended:
+        main.clock.tick(main.FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                pygame.quit()
+                return game
+        game.step(game.frame in flaps)
+        game.draw(main.screen)
+        pygame.display.flip()
+    pygame.quit()
+    return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-simulate or watch a recorded run")
+    parser.add_argument("replay", help="replay file")
+    parser.add_argument("--watch", action="store_true", help="play it back in a window")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.replay)
+    if args.watch:
+        game = watch(replay)
+    else:
+        started = time.perf_counter()
+        game = simulate(replay)
+        elapsed = time.perf_counter() - started
+        print(f"{game.frame} frames in {elapsed * 1000:.1f} ms ({game.frame / max(elapsed, 1e-9):.0f} frames/s)")
+    print(f"seed {replay.seed}  score {game.score}  lives left {game.lives}")
+
+
+if __name__ == "__main__":
+    main()
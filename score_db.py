@@ -0,0 +1,197 @@
+"""Optional SQLite score history.
+
+Where ScoreManager only keeps each player's best score, ScoreHistory keeps
+every finished game (name, score, lives used, duration, timestamp) in a
+stdlib sqlite3 database in WAL mode. A best_scores table, kept up to date
+as games are recorded, answers the all-time leaderboard and rank from its
+score index; time-window queries read only that window's games through a
+covering index. All queries are fixed parameterized statements, which
+sqlite3 prepares once and keeps in its statement cache.
+
+    python score_db.py import scores.db highscores.json [more.json ...]
+    python score_db.py top scores.db --days 7
+    python score_db.py player scores.db moon
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    lives_used INTEGER,
+    duration REAL,
+    played_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS best_scores (
+    name TEXT PRIMARY KEY,
+    score INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_by_player ON games (name, played_at);
+CREATE INDEX IF NOT EXISTS games_by_window ON games (played_at, name, score);
+CREATE INDEX IF NOT EXISTS best_by_score ON best_scores (score DESC, name);
+"""
+
+INSERT_GAME = "INSERT INTO games (name, score, lives_used, duration, played_at) VALUES (?, ?, ?, ?, ?)"
+INSERT_NEW_GAME = """
+    INSERT INTO games (name, score, lives_used, duration, played_at)
+    SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM games WHERE name = ? AND score = ?)
+"""
+ADD_PLAYER = "INSERT OR IGNORE INTO best_scores (name, score) VALUES (?, ?)"
+RAISE_BEST = "UPDATE best_scores SET score = ? WHERE name = ? AND score < ?"
+TOP_PLAYERS = "SELECT name, score FROM best_scores ORDER BY score DESC, name LIMIT ?"
+TOP_PLAYERS_SINCE = """
+    SELECT name, MAX(score) AS best FROM games INDEXED BY games_by_window
+    WHERE played_at >= ?
+    GROUP BY name ORDER BY best DESC, name LIMIT ?
+"""
+PLAYER_HISTORY = """
+    SELECT score, lives_used, duration, played_at FROM games
+    WHERE name = ? ORDER BY played_at DESC LIMIT ?
+"""
+PLAYER_STATS = """
+    SELECT COUNT(*), MAX(score), AVG(score), SUM(duration) FROM games
+    WHERE name = ? AND played_at >= ?
+"""
+PLAYER_RANK = """
+    SELECT (SELECT COUNT(*) FROM best_scores WHERE score > ?)
+         + (SELECT COUNT(*) FROM best_scores WHERE score = ? AND name < ?) + 1
+"""
+PLAYER_RANK_SINCE = """
+    SELECT COUNT(*) + 1 FROM (
+        SELECT name, MAX(score) AS best FROM games INDEXED BY games_by_window
+        WHERE played_at >= ? GROUP BY name
+    ) WHERE best > ? OR (best = ? AND name < ?)
+"""
+AVERAGE_SCORE = "SELECT AVG(score), COUNT(*) FROM games WHERE played_at >= ?"
+
+
+class ScoreHistory:
+    """Every completed game in an SQLite database"""
+
+    def __init__(self, filename="scores.db"):
+        self.filename = filename
+        # ScoreManager writes from its history writer thread, one write at a time
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record_game(self, name, score, lives_used=None, duration=None, played_at=None):
+        """Store one finished game"""
+        with self.conn:
+            self.conn.execute(INSERT_GAME, (name, score, lives_used, duration, played_at or time.time()))
+            self._raise_best(name, score)
+
+    def record_games(self, games):
+        """Store finished games, (name, score, lives_used, duration, played_at) each, in one transaction"""
+        with self.conn:
+            self.conn.executemany(INSERT_GAME, games)
+            for name, score, _, _, _ in games:
+                self._raise_best(name, score)
+
+    def _raise_best(self, name, score):
+        self.conn.execute(ADD_PLAYER, (name, score))
+        self.conn.execute(RAISE_BEST, (score, name, score))
+
+    def top_scores(self, limit=5, since=0):
+        """Best score per player, highest first, for games played since `since`"""
+        if not since:
+            return self.conn.execute(TOP_PLAYERS, (limit,)).fetchall()
+        return self.conn.execute(TOP_PLAYERS_SINCE, (since, limit)).fetchall()
+
+    def player_history(self, name, limit=50):
+        """A player's most recent games as (score, lives_used, duration, played_at)"""
+        return self.conn.execute(PLAYER_HISTORY, (name, limit)).fetchall()
+
+    def player_stats(self, name, since=0):
+        """games, best, average score and total play time for a player"""
+        games, best, average, duration = self.conn.execute(PLAYER_STATS, (name, since)).fetchone()
+        return {"games": games, "best": best, "average": average, "duration": duration}
+
+    def rank(self, name, since=0):
+        """1-based position of a player's best score in the window, or None"""
+        best = self.player_stats(name, since)["best"]
+        if best is None:
+            return None
+        if not since:
+            return self.conn.execute(PLAYER_RANK, (best, best, name)).fetchone()[0]
+        return self.conn.execute(PLAYER_RANK_SINCE, (since, best, best, name)).fetchone()[0]
+
+    def average_score(self, since=0):
+        """Mean score and number of games played since `since`"""
+        average, games = self.conn.execute(AVERAGE_SCORE, (since,)).fetchone()
+        return average, games
+
+    def import_json(self, *filenames):
+        """Bulk-load highscores.json files; each best score becomes one game.
+
+        The file's modification time stands in for when the games were
+        played, and lives used and duration are left unknown. Scores the
+        history already has a game for are skipped, so importing a file
+        again only adds the bests that are new since.
+        """
+        imported = 0
+        with self.conn:
+            for filename in filenames:
+                with open(filename, 'r') as f:
+                    scores = json.load(f)
+                played_at = os.path.getmtime(filename)
+                for name, score in scores.items():
+                    score = int(score)
+                    cursor = self.conn.execute(INSERT_NEW_GAME, (name, score, None, None, played_at, name, score))
+                    if cursor.rowcount:
+                        self._raise_best(name, score)
+                        imported += 1
+        return imported
+
+
+def since_days(days):
+    """Timestamp `days` ago, or 0 for all time"""
+    return time.time() - days * 86400 if days else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score history database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="bulk-load highscores.json files")
+    importer.add_argument("database")
+    importer.add_argument("files", nargs="+")
+
+    top = commands.add_parser("top", help="leaderboard")
+    top.add_argument("database")
+    top.add_argument("--limit", type=int, default=10)
+    top.add_argument("--days", type=float, default=0, help="only games from the last N days")
+
+    player = commands.add_parser("player", help="one player's stats and recent games")
+    player.add_argument("database")
+    player.add_argument("name")
+    player.add_argument("--days", type=float, default=0)
+
+    args = parser.parse_args(argv)
+    history = ScoreHistory(args.database)
+    try:
+        if args.command == "import":
+            print(f"imported {history.import_json(*args.files)} scores")
+        elif args.command == "top":
+            for i, (name, score) in enumerate(history.top_scores(args.limit, since_days(args.days)), 1):
+                print(f"{i}. {name}: {score}")
+        else:
+            since = since_days(args.days)
+            print(history.player_stats(args.name, since), "rank", history.rank(args.name, since))
+            for score, lives_used, duration, played_at in history.player_history(args.name):
+                print(time.strftime("%Y-%m-%d %H:%M", time.localtime(played_at)), score, lives_used, duration)
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
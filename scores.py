@@ -0,0 +1,573 @@
+"""High score storage.
+
+ScoreManager keeps every player's best score in memory and hands the
+actual file writing to a background thread, so a new high score never
+puts disk I/O in the middle of a frame. Writes are coalesced (only the
+latest snapshot is written) and crash-safe: the new file is written next
+to the old one, fsynced and swapped in with os.replace, and the previous
+version is kept as a .bak that loading falls back to. Finished games for
+the optional history database are queued and written on a writer thread
+the same way.
+
+Leaderboard keeps the table sorted as scores come in, so top-k and rank
+lookups never re-sort it.
+
+RemoteLeaderboard connects ScoreManager to a shared leaderboard_server.py:
+submissions are queued and sent in batches by a background thread over
+kept-alive connections, queued scores survive the server being down (and
+a restart, through a spool file), and the shared top scores are fetched
+periodically so reading them never waits on the network.
+"""
+import atexit
+import bisect
+import collections
+import http.client
+import itertools
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Seconds flush() waits for the writer by default, so a disk that keeps
+# failing cannot hang the caller
+FLUSH_TIMEOUT = 5.0
+
+# Player names as the game's name input allows them: 1-15 letters or digits.
+# The browser builds show shared names in the page, so nothing else is accepted.
+MAX_NAME = 15
+
+
+def valid_name(name):
+    return isinstance(name, str) and 0 < len(name) <= MAX_NAME and name.isalnum()
+
+
+def valid_score(score):
+    return isinstance(score, int) and not isinstance(score, bool) and score >= 0
+
+
+# ==================== ATOMIC FILES ====================
+def atomic_write(filename, data, backup=None):
+    """Replace `filename` with `data` (str or bytes) so a crash at any point
+    leaves either the old or the new file.
+
+    The data goes to a temporary file next to it, is fsynced and renamed
+    over the original, and the directory is fsynced so the rename sticks.
+    With `backup`, the previous file is kept under that name.
+    """
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    temp = f"{filename}.tmp-{os.getpid()}"
+    with open(temp, mode) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if backup and os.path.exists(filename):
+        os.replace(filename, backup)
+    os.replace(temp, filename)
+    sync_directory(os.path.dirname(os.path.abspath(filename)))
+
+
+def sync_directory(directory):
+    """Make renames in `directory` durable where the OS supports it"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ==================== FILE STORE ====================
+class JSONScoreStore:
+    """Atomic whole-file JSON storage with a backup copy"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.backup = filename + ".bak"
+
+    def load(self):
+        """Load scores, falling back to the backup if the file is damaged"""
+        for candidate in (self.filename, self.backup):
+            if not os.path.exists(candidate):
+                continue
+            try:
+                with open(candidate, 'r') as f:
+                    scores = json.load(f)
+                if isinstance(scores, dict):
+                    return scores
+            except (OSError, ValueError):
+                pass
+            # Keep the damaged file for inspection instead of overwriting it
+            self._quarantine(candidate)
+        return {}
+
+    def _quarantine(self, filename):
+        try:
+            os.replace(filename, f"{filename}.corrupt-{int(time.time())}")
+        except OSError:
+            pass
+
+    def save(self, scores):
+        """Write scores so that a crash at any point leaves a loadable file"""
+        atomic_write(self.filename, json.dumps(scores, indent=2), self.backup)
+
+
+# ==================== BACKGROUND WRITER ====================
+class BackgroundWriter:
+    """Writes the latest submitted snapshot on a daemon thread.
+
+    submit() never blocks on I/O. If several snapshots arrive before the
+    thread gets to them, only the newest is written. A snapshot may also be
+    a callable that returns the data; it is called on the writer thread, so
+    the caller only marks its data dirty instead of copying it.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.writes = 0
+        self.last_error = None
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot):
+        with self._cond:
+            self._pending = snapshot
+            self._cond.notify()
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait until everything submitted so far is on disk; False if it timed out"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def close(self):
+        """Flush and stop the thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._busy = True
+
+            failed = False
+            try:
+                self.store.save(snapshot() if callable(snapshot) else snapshot)
+                self.writes += 1
+            except OSError as e:
+                # Disk full, permissions and the like may clear up: retry
+                self.last_error = e
+                failed = True
+            except Exception as e:
+                # Data that cannot be written never will be; drop it
+                self.last_error = e
+            finally:
+                with self._cond:
+                    self._busy = False
+                    if failed and self._pending is None:
+                        # Keep the data queued so it is retried
+                        self._pending = snapshot
+                    self._cond.notify_all()
+                    closed = self._closed
+            if failed and closed:
+                return
+            if failed:
+                time.sleep(1)
+
+
+# ==================== LEADERBOARD INDEX ====================
+class Leaderboard:
+    """Sorted index over a name -> best score map.
+
+    Entries are kept as (-score, name), so the best scores come first and
+    ties are broken by name, in a bucketed sorted list: short sorted
+    buckets of about BUCKET entries, the last entry of each for a binary
+    search across buckets, and a Fenwick tree over the bucket sizes for
+    positions. Inserting or removing an entry is a binary search plus a
+    shift inside one bucket, O(log n) for a fixed bucket size; buckets
+    split when they grow to twice BUCKET. top(k) reads the first buckets
+    and rank(name) is two binary searches and a tree lookup.
+
+    The map passed in is kept, not copied, and update() keeps it current.
+    """
+
+    BUCKET = 1000
+
+    def __init__(self, scores=None):
+        self.scores = scores if scores is not None else {}
+        order = sorted((-score, name) for name, score in self.scores.items())
+        self._buckets = [order[i:i + self.BUCKET] for i in range(0, len(order), self.BUCKET)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._rebuild_sizes()
+
+    def __len__(self):
+        return len(self.scores)
+
+    # ---------- Bucket sizes (Fenwick tree) ----------
+    def _rebuild_sizes(self):
+        tree = [0] + [len(bucket) for bucket in self._buckets]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._sizes = tree
+
+    def _resize(self, index, delta):
+        tree = self._sizes
+        i = index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _entries_before(self, index):
+        """Entries in the buckets before bucket `index`"""
+        total = 0
+        while index:
+            total += self._sizes[index]
+            index -= index & -index
+        return total
+
+    # ---------- Entries ----------
+    def _insert(self, entry):
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            self._rebuild_sizes()
+            return
+        i = min(bisect.bisect_left(self._maxes, entry), len(self._buckets) - 1)
+        bucket = self._buckets[i]
+        bisect.insort(bucket, entry)
+        self._maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.BUCKET:
+            half = len(bucket) // 2
+            self._buckets[i:i + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[i:i + 1] = [bucket[half - 1], bucket[-1]]
+            self._rebuild_sizes()
+        else:
+            self._resize(i, 1)
+
+    def _remove(self, entry):
+        i = bisect.bisect_left(self._maxes, entry)
+        bucket = self._buckets[i]
+        del bucket[bisect.bisect_left(bucket, entry)]
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._resize(i, -1)
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+            self._rebuild_sizes()
+
+    def update(self, name, score):
+        """Set name's score, moving its entry to the right place"""
+        old = self.scores.get(name)
+        if old is not None:
+            self._remove((-old, name))
+        self.scores[name] = score
+        self._insert((-score, name))
+
+    def top(self, k):
+        """The k best (name, score) pairs"""
+        best = []
+        for bucket in self._buckets:
+            if len(best) >= k:
+                break
+            best.extend((name, -negated) for negated, name in bucket[:k - len(best)])
+        return best
+
+    def rank(self, name):
+        """1-based position of name, or None if it has no score"""
+        score = self.scores.get(name)
+        if score is None:
+            return None
+        entry = (-score, name)
+        i = bisect.bisect_left(self._maxes, entry)
+        return self._entries_before(i) + bisect.bisect_left(self._buckets[i], entry) + 1
+
+
+# ==================== SHARED LEADERBOARD CLIENT ====================
+class ConnectionPool:
+    """Reusable keep-alive HTTP connections to one server"""
+
+    def __init__(self, url, size=2, timeout=2.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def request(self, method, path, body=None):
+        """Send a request and return (status, decoded JSON body)"""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+        with self._lock:
+            if len(self._idle) < self.size and not response.will_close:
+                self._idle.append(conn)
+            else:
+                conn.close()
+        return response.status, json.loads(data) if data else None
+
+    def close(self):
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+
+
+class RemoteLeaderboard:
+    """Non-blocking client for leaderboard_server.py.
+
+    submit() only appends to a queue and top() only reads the last fetched
+    board; a daemon thread does the network work. While the server cannot
+    be reached, submissions stay queued (up to max_queue, oldest dropped
+    first) and are retried with backoff; close() spools whatever is left
+    to `spool` so the next start sends it. Entries the server would refuse
+    (see valid_name) are dropped rather than retried.
+    """
+
+    def __init__(self, url, spool=None, refresh_interval=5.0, top_size=10, batch_size=200, max_queue=10000):
+        self.pool = ConnectionPool(url)
+        self.spool = spool
+        self.refresh_interval = refresh_interval
+        self.top_size = top_size  # Entries fetched from the shared board
+        self.batch_size = batch_size
+        self.online = False
+        self.sent = 0
+        self.last_error = None
+        self._queue = collections.deque(maxlen=max_queue)
+        self._top = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._load_spool()
+        self._thread = threading.Thread(target=self._run, name="leaderboard-client", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, score):
+        with self._cond:
+            self._queue.append({"name": name, "score": score})
+            self._cond.notify()
+
+    def top(self, limit):
+        """Shared top scores as last fetched, or None before the first fetch"""
+        board = self._top
+        return None if board is None else board[:limit]
+
+    def pending(self):
+        with self._cond:
+            return len(self._queue)
+
+    def close(self, timeout=2.0):
+        """Try to send what is queued, spool the rest and stop the thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self._save_spool()
+        self.pool.close()
+
+    def _run(self):
+        backoff = 1.0
+        next_fetch = 0.0  # When to fetch the board (or retry, while offline)
+        while True:
+            with self._cond:
+                while not self._closed:
+                    now = time.monotonic()
+                    if now >= next_fetch or (self._queue and self.online):
+                        break
+                    self._cond.wait(next_fetch - now)
+                batch = list(itertools.islice(self._queue, self.batch_size))
+                closed = self._closed
+            try:
+                if batch:
+                    # The server refuses a whole batch over one bad entry, and
+                    # resending it would never help, so those are dropped here
+                    good = [entry for entry in batch if isinstance(entry, dict)
+                            and valid_name(entry.get("name")) and valid_score(entry.get("score"))]
+                    if good:
+                        status, _ = self.pool.request("POST", "/scores", json.dumps(good))
+                        if status != 200:
+                            raise http.client.HTTPException(f"POST /scores returned {status}")
+                    with self._cond:
+                        for _ in batch:
+                            self._queue.popleft()
+                    self.sent += len(good)
+                status, board = self.pool.request("GET", f"/top?limit={self.top_size}")
+                if status == 200:
+                    self._top = [tuple(entry) for entry in board]
+                self.online = True
+                backoff = 1.0
+                next_fetch = time.monotonic() + self.refresh_interval
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                self.last_error = e
+                self.online = False
+                if closed:
+                    return
+                next_fetch = time.monotonic() + backoff
+                backoff = min(backoff * 2, 30.0)
+            if closed and not self.pending():
+                return
+
+    def _load_spool(self):
+        if not self.spool or not os.path.exists(self.spool):
+            return
+        try:
+            with open(self.spool, 'r') as f:
+                self._queue.extend(json.load(f))
+            os.remove(self.spool)
+        except (OSError, ValueError):
+            pass
+
+    def _save_spool(self):
+        with self._cond:
+            queued = list(self._queue)
+        if self.spool and queued:
+            with open(self.spool, 'w') as f:
+                json.dump(queued, f)
+
+
+# ==================== HISTORY QUEUE ====================
+class HistoryQueue:
+    """Finished games waiting to go into a score_db.ScoreHistory.
+
+    add() only appends. A BackgroundWriter passes pending() to save() on its
+    thread, which writes the games in one transaction and only then drops
+    them from the queue, so a failed write loses nothing.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self._games = []
+        self._lock = threading.Lock()
+
+    def add(self, name, score, lives_used=None, duration=None):
+        with self._lock:
+            self._games.append((name, score, lives_used, duration, time.time()))
+
+    def pending(self):
+        with self._lock:
+            return list(self._games)
+
+    def save(self, games):
+        self.history.record_games(games)
+        with self._lock:
+            del self._games[:len(games)]
+
+
+# ==================== SCORE MANAGEMENT ====================
+class ScoreManager:
+    """Manages high scores storage and retrieval"""
+
+    def __init__(self, filename, background=True, history=None, remote=None):
+        self.filename = filename
+        self.history = history  # Optional score_db.ScoreHistory
+        self.remote = remote  # Optional RemoteLeaderboard shared with other machines
+        self.store = JSONScoreStore(filename)
+        self.leaderboard = Leaderboard(self.load_scores())
+        self._lock = threading.Lock()  # Held while scores change or the writer copies them
+        self.writer = BackgroundWriter(self.store) if background else None
+        # Games go into the history on a writer thread too, never mid-frame
+        self.history_queue = HistoryQueue(history) if history is not None and background else None
+        self.history_writer = BackgroundWriter(self.history_queue) if self.history_queue else None
+        if self.writer:
+            atexit.register(self.close)
+
+    @property
+    def scores(self):
+        """name -> best score; the leaderboard's own map, not a copy"""
+        return self.leaderboard.scores
+
+    def load_scores(self):
+        """Load scores from file"""
+        return self.store.load()
+
+    def save_scores(self):
+        """Save scores to file (queued to the writer thread when there is one)"""
+        if self.writer:
+            # The table is copied on the writer thread, not in the middle of a frame
+            self.writer.submit(self._snapshot)
+        else:
+            self.store.save(self.scores)
+
+    def _snapshot(self):
+        with self._lock:
+            return dict(self.scores)
+
+    def add_score(self, name, score):
+        """Add or update a player's score"""
+        if self.remote is not None:
+            self.remote.submit(name, score)
+        if name not in self.scores or score > self.scores[name]:
+            with self._lock:
+                self.leaderboard.update(name, score)
+            self.save_scores()
+            return True
+        return False
+
+    def get_top_scores(self, limit=5):
+        """Get top scores sorted (the shared board's, once it has been fetched)"""
+        if self.remote is not None:
+            shared = self.remote.top(limit)
+            if shared is not None:
+                return shared
+        return self.leaderboard.top(limit)
+
+    def record_game(self, name, score, lives_used=None, duration=None):
+        """Keep a finished game in the history database, if there is one"""
+        if self.history_writer:
+            self.history_queue.add(name, score, lives_used, duration)
+            self.history_writer.submit(self.history_queue.pending)
+        elif self.history is not None:
+            self.history.record_game(name, score, lives_used, duration)
+
+    def get_rank(self, name):
+        """1-based leaderboard position of a player, or None"""
+        return self.leaderboard.rank(name)
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Block until queued writes are on disk; False if they are not there within `timeout`"""
+        flushed = True
+        for writer in (self.writer, self.history_writer):
+            if writer:
+                flushed = writer.flush(timeout) and flushed
+        return flushed
+
+    def close(self):
+        """Write anything still queued and stop the writer thread"""
+        atexit.unregister(self.close)
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+        if self.history_writer:
+            self.history_writer.close()
+            self.history_writer = None
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+        if self.remote is not None:
+            self.remote.close()
+            self.remote = None
@@ -0,0 +1,867 @@
+"""Headless simulation core for Flappy Penguin.
+
+Nothing in this module touches pygame: no display, no fonts, no Rects.
+The renderer in main.py subclasses these classes and adds the draw methods,
+so tools that only need to step the game (tuning runs, bots, regression
+checks) can import this module without paying for a window.
+"""
+import hashlib
+import json
+import math
+import operator
+import random
+import struct
+
+# Screen dimensions
+SCREEN_WIDTH = 500
+SCREEN_HEIGHT = 600
+FPS = 60
+
+# Physics constants
+GRAVITY = 0.12
+FLAP_STRENGTH = -3.2
+PIPE_GAP = 160
+PIPE_WIDTH = 52
+PIPE_VELOCITY_START = -1.8
+GAP_REROLLS = 10  # Tries Game.gap_filter gets before a gap is used anyway
+
+
+# ==================== PHYSICS CONFIG ====================
+class Physics:
+    """Physics and difficulty-ramp settings a game runs with.
+
+    The defaults are the module constants above and the original ramp:
+    each pipe passed speeds pipes up by early_speedup below hard_score
+    points and by late_speedup from then on, where each pass also spawns
+    pipes spawn_interval_step frames sooner, down to min_spawn_interval;
+    reversed_chance of the pipes spawned from hard_score on are reversed.
+    Treat instances as immutable and derive variants with replace().
+
+    Settings are checked on creation: the whole-number ones are stored as
+    ints (so 160.0 from a JSON file is the stock 160), the rest as floats,
+    and values outside LIMITS raise ValueError.
+    """
+
+    FIELDS = (
+        "gravity", "flap_strength", "pipe_gap", "pipe_velocity_start", "spawn_interval",
+        "early_speedup", "late_speedup", "hard_score", "spawn_interval_step", "min_spawn_interval",
+        "reversed_chance",
+    )
+    __slots__ = FIELDS
+    WHOLE = ("pipe_gap", "spawn_interval", "hard_score", "spawn_interval_step", "min_spawn_interval")
+    # The widest gap still leaves Pipe's 50 px margins and a 50 px range to roll the opening in
+    LIMITS = {
+        "gravity": (lambda v: v > 0, "above 0"),
+        "flap_strength": (lambda v: v < 0, "below 0"),
+        "pipe_gap": (lambda v: 1 <= v <= SCREEN_HEIGHT - 200, f"from 1 to {SCREEN_HEIGHT - 200}"),
+        "pipe_velocity_start": (lambda v: v < 0, "below 0"),
+        "spawn_interval": (lambda v: v >= 1, "at least 1"),
+        "early_speedup": (lambda v: v >= 0, "at least 0"),
+        "late_speedup": (lambda v: v >= 0, "at least 0"),
+        "hard_score": (lambda v: v >= 0, "at least 0"),
+        "spawn_interval_step": (lambda v: v >= 0, "at least 0"),
+        "min_spawn_interval": (lambda v: v >= 1, "at least 1"),
+        "reversed_chance": (lambda v: 0 <= v <= 1, "from 0 to 1"),
+    }
+
+    def __init__(self, gravity=GRAVITY, flap_strength=FLAP_STRENGTH, pipe_gap=PIPE_GAP,
+                 pipe_velocity_start=PIPE_VELOCITY_START, spawn_interval=100, early_speedup=0.08,
+                 late_speedup=0.25, hard_score=15, spawn_interval_step=2, min_spawn_interval=60,
+                 reversed_chance=0.6):
+        self.gravity = gravity
+        self.flap_strength = flap_strength
+        self.pipe_gap = pipe_gap  # Whole pixels
+        self.pipe_velocity_start = pipe_velocity_start
+        self.spawn_interval = spawn_interval  # Frames between pipe spawns at the start
+        self.early_speedup = early_speedup
+        self.late_speedup = late_speedup
+        self.hard_score = hard_score
+        self.spawn_interval_step = spawn_interval_step
+        self.min_spawn_interval = min_spawn_interval
+        self.reversed_chance = reversed_chance
+        for name in self.FIELDS:
+            setattr(self, name, self._checked(name, getattr(self, name)))
+
+    @classmethod
+    def _checked(cls, name, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError(f"{name} must be a number, not {value!r}")
+        if not math.isfinite(value):
+            raise ValueError(f"{name} must be finite, not {value}")
+        if name in cls.WHOLE:
+            if not float(value).is_integer():
+                raise ValueError(f"{name} must be a whole number, not {value}")
+            value = int(value)
+        else:
+            value = float(value)
+        allowed, requirement = cls.LIMITS[name]
+        if not allowed(value):
+            raise ValueError(f"{name} must be {requirement}, not {value}")
+        return value
+
+    def replace(self, **changes):
+        """Copy with some settings changed"""
+        return Physics(**{**self.as_dict(), **changes})
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def key(self):
+        """Stable hash of the settings, for caching results per config"""
+        text = json.dumps(self.as_dict(), sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+    @classmethod
+    def load(cls, filename):
+        """Settings from a JSON object of field: value; missing fields keep their defaults"""
+        with open(filename, 'r') as f:
+            return cls(**json.load(f))
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write("\n")
+
+    def __eq__(self, other):
+        return isinstance(other, Physics) and self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        return hash(tuple(self.as_dict().values()))
+
+    def __repr__(self):
+        changed = ", ".join(f"{name}={value!r}" for name, value in self.as_dict().items()
+                            if value != getattr(DEFAULT_PHYSICS, name, value))
+        return f"Physics({changed})"
+
+
+DEFAULT_PHYSICS = Physics()
+
+
+# ==================== COLLISION HELPERS ====================
+def make_rect(x, y, width, height):
+    """Build an (x, y, width, height) tuple the same way pygame.Rect does.
+
+    pygame truncates float coordinates toward zero, so we do too - this keeps
+    headless collisions identical to the ones the windowed game used to get.
+    """
+    return (int(x), int(y), int(width), int(height))
+
+
+def rects_collide(a, b):
+    """Same rules as pygame.Rect.colliderect for non-negative sizes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    if not (aw and ah and bw and bh):
+        return False
+    return ax < bx + bw and ay < by + bh and ax + aw > bx and ay + ah > by
+
+
+# ==================== BIRD CLASS ====================
+class Bird:
+    """Handles bird object with gravity and flapping mechanics"""
+
+    __slots__ = ("x", "y", "prev_y", "velocity", "width", "height", "alive", "gravity", "flap_strength")
+
+    def __init__(self, x, y, physics=DEFAULT_PHYSICS):
+        self.x = x
+        self.y = y
+        self.prev_y = y  # Position before the last update, for interpolation
+        self.velocity = 0
+        self.width = 24
+        self.height = 20
+        self.alive = True
+        self.gravity = physics.gravity
+        self.flap_strength = physics.flap_strength
+
+    def flap(self):
+        """Make the bird jump upward"""
+        self.velocity = self.flap_strength
+
+    def update(self):
+        """Update bird position with gravity"""
+        self.prev_y = self.y
+        self.velocity += self.gravity
+        self.y += self.velocity
+
+        # Check if bird hits ground or ceiling
+        if self.y + self.height >= SCREEN_HEIGHT - 50 or self.y <= 0:
+            self.alive = False
+
+    def collision_rect(self):
+        """Collision box, tighter around the actual penguin sprite"""
+        return make_rect(self.x + 5, self.y + 2, 20, 20)
+
+
+# ==================== GHOST CLASS ====================
+class Ghost(Bird):
+    """Extra penguin flying the same pipes as the player.
+
+    Steered by recorded flap frames (a replay's) or by a policy(bird, pipes)
+    like tournament.follow_gap. Ghosts have one life and their own score.
+    """
+
+    __slots__ = ("score", "flaps", "policy")
+
+    def __init__(self, flaps=None, policy=None, physics=DEFAULT_PHYSICS):
+        super().__init__(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2, physics)
+        self.score = 0
+        self.flaps = frozenset(flaps) if flaps is not None else None
+        self.policy = policy
+
+    def restart(self):
+        """Back to the start for a new game"""
+        self.y = self.prev_y = SCREEN_HEIGHT // 2
+        self.velocity = 0
+        self.alive = True
+        self.score = 0
+
+    def wants_flap(self, frame, pipes):
+        if self.flaps is not None:
+            return frame in self.flaps
+        return self.policy is not None and self.policy(self, pipes)
+
+
+# ==================== PIPE CLASS ====================
+class Pipe:
+    """Handles pipe objects that the bird must avoid.
+
+    Game recycles pipes that scroll off screen through respawn() instead of
+    allocating new ones, and the vertical extent of both collision boxes is
+    worked out once per spawn, so stepping allocates nothing.
+    """
+
+    __slots__ = (
+        "x", "prev_x", "width", "gap", "pipe_velocity", "reversed_gap",
+        "top_pipe_height", "bottom_pipe_height", "bottom_y", "gap_start", "gap_end", "scored",
+    )
+
+    def __init__(self, x, pipe_velocity, reversed_gap=False, rng=random, gap_position=None, gap=PIPE_GAP):
+        self.respawn(x, pipe_velocity, reversed_gap, rng, gap_position, gap)
+
+    def respawn(self, x, pipe_velocity, reversed_gap=False, rng=random, gap_position=None, gap=PIPE_GAP):
+        """(Re)initialise this pipe as a freshly spawned one.
+
+        The gap is rolled from `rng` unless `gap_position` (for example
+        from a precomputed course) is given.
+        """
+        self.x = x
+        self.prev_x = x  # Position before the last update, for interpolation
+        self.width = PIPE_WIDTH
+        self.gap = gap
+        self.pipe_velocity = pipe_velocity
+        self.reversed_gap = reversed_gap
+
+        # Generate random gap position with guaranteed passable space
+        # The gap is always `gap` pixels tall
+        # Calculate valid range for gap start position
+        min_gap_pos = 50
+        max_gap_pos = SCREEN_HEIGHT - 50 - self.gap - 50
+        if gap_position is None:
+            gap_position = rng.randint(min_gap_pos, max_gap_pos)
+
+        if reversed_gap:
+            # Reversed: larger portion on top, smaller on bottom (inverted pattern)
+            # Create gap from bottom up
+            self.bottom_pipe_height = gap_position
+            self.gap_start = gap_position
+            self.gap_end = gap_position + self.gap
+            self.top_pipe_height = SCREEN_HEIGHT - 50 - self.gap_end
+        else:
+            # Normal: smaller portion on top, larger on bottom
+            # Create gap in the middle
+            self.top_pipe_height = gap_position
+            self.gap_start = gap_position
+            self.gap_end = gap_position + self.gap
+            self.bottom_pipe_height = SCREEN_HEIGHT - 50 - self.gap_end
+
+        # Top of the bottom pipe
+        if reversed_gap:
+            self.bottom_y = SCREEN_HEIGHT - 50 - self.bottom_pipe_height
+        else:
+            self.bottom_y = self.gap_end
+
+        self.scored = False  # Track if player has passed this pipe
+
+    def update(self):
+        """Move pipe to the left"""
+        self.prev_x = self.x
+        self.x += self.pipe_velocity
+
+    def off_screen(self):
+        """Check if pipe is off the left side of screen"""
+        return self.x + self.width < 0
+
+    def opening(self):
+        """Top and bottom y of the space the bird can actually fly through"""
+        return self.top_pipe_height, self.top_pipe_height + self.gap
+
+    def top_rect(self):
+        """Top pipe as an (x, y, width, height) tuple"""
+        return make_rect(self.x, 0, self.width, self.top_pipe_height)
+
+    def bottom_rect(self):
+        """Bottom pipe as an (x, y, width, height) tuple"""
+        return make_rect(self.x, self.bottom_y, self.width, self.bottom_pipe_height)
+
+    def check_collision(self, bird):
+        """Check if bird collides with pipe - improved accuracy.
+
+        Same result as rects_collide() against top_rect() and bottom_rect(),
+        without building any tuples.
+        """
+        # Bird box is (x + 5, y + 2, 20, 20), truncated like pygame.Rect
+        bird_left = int(bird.x + 5)
+        pipe_left = int(self.x)
+        if not (self.width and bird_left < pipe_left + self.width and bird_left + 20 > pipe_left):
+            return False
+        bird_top = int(bird.y + 2)
+        if self.top_pipe_height and bird_top < self.top_pipe_height and bird_top + 20 > 0:
+            return True
+        return bool(self.bottom_pipe_height and bird_top < self.bottom_y + self.bottom_pipe_height
+                    and bird_top + 20 > self.bottom_y)
+
+    def check_swept_collision(self, bird):
+        """Check if the bird touched the pipe at any point during the last update.
+
+        The pipe moved from prev_x to x and the bird from prev_y to y, both
+        in straight lines. Working out the part of the step in which the two
+        overlap horizontally and then testing the bird's vertical span over
+        just that part catches pipes fast enough to jump clean over the
+        bird between two frames, which check_collision() alone misses.
+        """
+        if self.check_collision(bird):
+            return True
+        bird_left = bird.x + 5
+        dx = self.x - self.prev_x
+        # Times t in [0, 1] where bird_left - width < prev_x + t * dx < bird_left + 20
+        low = bird_left - self.width - self.prev_x
+        high = bird_left + 20 - self.prev_x
+        if dx:
+            t0, t1 = sorted((low / dx, high / dx))
+            t0, t1 = max(t0, 0.0), min(t1, 1.0)
+            if t0 >= t1:
+                return False
+        elif not low < 0 < high:
+            return False
+        else:
+            t0, t1 = 0.0, 1.0
+
+        # Bird box top over that part of the step
+        dy = bird.y - bird.prev_y
+        y0 = bird.prev_y + 2 + t0 * dy
+        y1 = bird.prev_y + 2 + t1 * dy
+        top, bottom = min(y0, y1), max(y0, y1)
+        if self.top_pipe_height and top < self.top_pipe_height and bottom + 20 > 0:
+            return True
+        return bool(self.bottom_pipe_height and top < self.bottom_y + self.bottom_pipe_height
+                    and bottom + 20 > self.bottom_y)
+
+
+# ==================== GAME CLASS ====================
+class Game:
+    """Game state and rules, stepped one frame at a time"""
+
+    # The renderer swaps these for its drawable subclasses
+    bird_class = Bird
+    pipe_class = Pipe
+
+    # Where pipes come from when not rolled on the fly: anything with
+    # rewind() and next_pipe() -> (gap_position, reversed_gap) or None once
+    # it runs out, such as course.Course or course.CourseReader. Snapshots
+    # and continue_round() also need its `position`, seek(position) and len().
+    course = None
+
+    # Test collisions along each step's motion rather than only at its end;
+    # needed once pipes move further per frame than the bird is wide
+    swept_collisions = False
+
+    # Optional check on rolled gaps: called as gap_filter(game, gap_position,
+    # reversed_gap) and the gap is re-rolled (up to GAP_REROLLS times) while it
+    # returns False; see reachability.SpawnChecker. Course pipes are never filtered.
+    gap_filter = None
+
+    # Physics and difficulty ramp; pass another Physics to Game() to retune
+    physics = DEFAULT_PHYSICS
+
+    def __init__(self, seed=None, physics=None):
+        if physics is not None:
+            self.physics = physics
+        self.lives = 3
+        self.total_lives = 3
+        self.game_ended = False
+        self.heart_break_animation = False
+        self.heart_break_timer = 0
+        self.pipes = []
+        self.pipe_pool = []  # Off-screen pipes waiting to be respawned
+        self.ghosts = []
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Reset game to initial state.
+
+        Every reset starts a new run with its own RNG, seeded from `seed` or
+        from a fresh random seed, so the run can be replayed from the seed
+        and the flap frames alone. Seeds are integers from 0 to 2**64 - 1,
+        the range snapshots store.
+        """
+        if seed is None:
+            seed = random.getrandbits(63)
+        seed = operator.index(seed)  # Also takes NumPy integers; TypeError for anything else
+        if not 0 <= seed < 1 << 64:
+            raise ValueError(f"seed must be from 0 to 2**64 - 1, not {seed}")
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self._packed_rng = None  # RNG state as last packed by snapshot()
+        if self.course is not None:
+            self.course.rewind()
+        self.frame = 0  # Updates the current run has actually advanced
+        self.flap_frames = []  # Frame index of every flap, for replays
+        self.start_lives = self.lives
+        self.bird = self.bird_class(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2, self.physics)
+        self.recycle_pipes()
+        for ghost in self.ghosts:
+            ghost.restart()
+        self.score = 0
+        self.game_over = False
+        self.game_started = False
+        self.pipe_velocity = self.physics.pipe_velocity_start
+        self.pipe_spawn_timer = 0
+        self.pipe_spawn_interval = self.physics.spawn_interval  # Frames between pipe spawns
+
+    def new_game(self, seed=None):
+        """Start over with a full set of lives"""
+        self.lives = self.total_lives
+        self.game_ended = False
+        self.reset(seed)
+
+    @property
+    def lives_used(self):
+        """Lives lost so far this game"""
+        return self.total_lives - max(self.lives, 0)
+
+    def continue_round(self):
+        """Spend the next life: fresh bird and pipes, score and speed carry over.
+
+        On a course, the pipes that were on screen but not yet passed are
+        handed out again, so the course is still flown in order. Once it
+        has run out the next pipes are rolled, as they would be anyway.
+        """
+        self.bird = self.bird_class(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2, self.physics)
+        if self.course is not None and self.course.position < len(self.course):
+            # Every pipe on screen came from the course, the unpassed ones last
+            self.course.seek(self.course.position - sum(not pipe.scored for pipe in self.pipes))
+        self.recycle_pipes()
+        self.game_over = False
+        self.game_started = False
+
+    def recycle_pipes(self):
+        """Move every pipe to the pool, leaving the course empty"""
+        self.pipe_pool.extend(self.pipes)
+        self.pipes.clear()
+
+    def step(self, flap=False):
+        """Advance one frame with no player at the keyboard.
+
+        Spends the next life straight away after a crash, applies the flap
+        (if any) and updates. This is the loop headless runs are built on.
+        """
+        if self.game_ended:
+            return
+        if self.game_over:
+            self.continue_round()
+        self.game_started = True
+        if flap:
+            self.flap()
+        self.update()
+
+    def flap(self):
+        """Flap the bird and note the frame for the replay"""
+        self.bird.flap()
+        self.flap_frames.append(self.frame)
+
+    def spawn_pipe(self):
+        """Create a new pipe"""
+        physics = self.physics
+        planned = self.course.next_pipe() if self.course is not None else None
+        if planned is None:
+            self._packed_rng = None  # About to draw from the RNG
+            # Use reversed gap (more challenging) after 15 points (60% of pipes by default)
+            reversed_gap = self.score >= physics.hard_score and self.rng.random() < physics.reversed_chance
+            gap_position = None
+            if self.gap_filter is not None:
+                for _ in range(GAP_REROLLS):
+                    gap_position = self.rng.randint(50, SCREEN_HEIGHT - 50 - physics.pipe_gap - 50)
+                    if self.gap_filter(self, gap_position, reversed_gap):
+                        break
+        else:
+            # The course says which pipes flip; they still only do so after 15
+            gap_position, reversed_gap = planned
+            reversed_gap = reversed_gap and self.score >= physics.hard_score
+        if self.pipe_pool:
+            pipe = self.pipe_pool.pop()
+            pipe.respawn(SCREEN_WIDTH, self.pipe_velocity, reversed_gap, self.rng, gap_position, physics.pipe_gap)
+        else:
+            pipe = self.pipe_class(SCREEN_WIDTH, self.pipe_velocity, reversed_gap=reversed_gap, rng=self.rng,
+                                   gap_position=gap_position, gap=physics.pipe_gap)
+        self.pipes.append(pipe)
+
+    def add_ghost(self, flaps=None, policy=None):
+        """Add a ghost driven by flap frames or a policy; see Ghost"""
+        ghost = Ghost(flaps, policy, self.physics)
+        self.ghosts.append(ghost)
+        return ghost
+
+    def live_lost(self):
+        """Handle when a live is lost - with heart break animation"""
+        self.lives -= 1
+        self.heart_break_animation = True
+        self.heart_break_timer = 30  # Animation frames
+        if self.lives <= 0:
+            self.game_ended = True
+
+    def update(self):
+        """Update game state"""
+        if not self.game_started or self.game_over:
+            return
+        if self.ghosts:
+            self.move_ghosts()
+        self.frame += 1
+
+        # Update bird
+        self.bird.update()
+
+        # Check if bird is alive
+        if not self.bird.alive:
+            self.game_over = True
+            self.live_lost()
+
+        # Spawn pipes
+        self.pipe_spawn_timer += 1
+        if self.pipe_spawn_timer >= self.pipe_spawn_interval:
+            self.spawn_pipe()
+            self.pipe_spawn_timer = 0
+
+        # Update pipes
+        passed = 0
+        off_screen = False
+        bird_left = self.bird.x + 5  # Left edge of the bird's collision box
+        for pipe in self.pipes:
+            pipe.update()
+            off_screen = off_screen or pipe.x + pipe.width < 0
+
+            # Check collision, skipping pipes nowhere near the bird
+            if self.swept_collisions:
+                near = min(pipe.x, pipe.prev_x) - 1 < bird_left + 20 and max(pipe.x, pipe.prev_x) + pipe.width + 1 > bird_left
+                if near and pipe.check_swept_collision(self.bird):
+                    self.game_over = True
+                    self.live_lost()
+            elif pipe.x - 1 < bird_left + 20 and pipe.x + pipe.width + 1 > bird_left and pipe.check_collision(self.bird):
+                self.game_over = True
+                self.live_lost()
+
+            # Check if bird passed pipe
+            if not pipe.scored and pipe.x + pipe.width < self.bird.x:
+                pipe.scored = True
+                self.score += 1
+                passed += 1
+
+                # Increase difficulty
+                physics = self.physics
+                if self.score < physics.hard_score:
+                    # Normal difficulty before 15 points
+                    self.pipe_velocity -= physics.early_speedup
+                else:
+                    # MUCH TOUGHER difficulty after 15 points
+                    # Significantly increase speed
+                    self.pipe_velocity -= physics.late_speedup
+
+                    # Aggressively increase spawn rate for extra challenge
+                    if self.pipe_spawn_interval > physics.min_spawn_interval:
+                        self.pipe_spawn_interval -= physics.spawn_interval_step
+
+        if self.ghosts:
+            self.check_ghosts(bird_left, passed)
+
+        # Remove off-screen pipes, compacting the list in place
+        if off_screen:
+            kept = 0
+            for pipe in self.pipes:
+                if pipe.off_screen():
+                    self.pipe_pool.append(pipe)
+                else:
+                    self.pipes[kept] = pipe
+                    kept += 1
+            del self.pipes[kept:]
+
+
+    def move_ghosts(self):
+        """Flap and fall every live ghost, before the pipes move (as for the player)"""
+        frame, pipes = self.frame, self.pipes
+        for ghost in self.ghosts:
+            if ghost.alive:
+                if ghost.wants_flap(frame, pipes):
+                    ghost.flap()
+                ghost.update()
+
+    def check_ghosts(self, bird_left, passed):
+        """Collide live ghosts with the pipes near them and credit `passed` pipes.
+
+        Every penguin flies at the same x, so the pipes worth testing are
+        found once for all of them.
+        """
+        near = [p for p in self.pipes
+                if min(p.x, p.prev_x) - 1 < bird_left + 20 and max(p.x, p.prev_x) + p.width + 1 > bird_left]
+        swept = self.swept_collisions
+        for ghost in self.ghosts:
+            if not ghost.alive:
+                continue
+            for pipe in near:
+                if pipe.check_swept_collision(ghost) if swept else pipe.check_collision(ghost):
+                    ghost.alive = False
+                    break
+            else:
+                ghost.score += passed
+
+
+    # ---------- Snapshots ----------
+    def snapshot(self, state="", flaps=False):
+        """Everything needed to resume this game, as compact bytes.
+
+        `state` is a short string for the caller's own mode (main.py's
+        screen). The flap frames are only counted unless `flaps` is set:
+        restoring a snapshot into the run it came from just cuts the list
+        back, while one that must survive a restart of the program (kiosk
+        crash-resume) should carry them. See SNAPSHOT_LAYOUT for the format.
+        """
+        bird = self.bird
+        course = self.course
+        flags = (self.game_over | self.game_started << 1 | self.game_ended << 2
+                 | self.heart_break_animation << 3 | bird.alive << 4 | flaps << 5)
+        encoded_state = state.encode()
+        packed_rng = self._packed_rng
+        if packed_rng is None:
+            # The RNG is only drawn from when a pipe spawns, so this is
+            # packed again a few times a second at most
+            version, internal, gauss = self.rng.getstate()
+            packed_rng = self._packed_rng = _RNG.pack(*internal, gauss is not None, gauss or 0.0)
+        parts = [
+            _HEADER.pack(
+                SNAPSHOT_VERSION, flags, self.seed, self.frame, self.lives, self.total_lives,
+                self.start_lives, self.heart_break_timer, self.score, self.pipe_velocity,
+                self.pipe_spawn_timer, self.pipe_spawn_interval, bird.y, bird.prev_y, bird.velocity,
+                len(self.flap_frames), NO_COURSE if course is None else course.position,
+                len(self.pipes), len(self.ghosts), len(encoded_state),
+            ),
+            encoded_state,
+            packed_rng,
+        ]
+        pack_pipe = _PIPE.pack
+        for pipe in self.pipes:
+            parts.append(pack_pipe(pipe.x, pipe.prev_x, pipe.pipe_velocity, pipe.gap_start,
+                                   pipe.reversed_gap, pipe.scored))
+        pack_ghost = _GHOST.pack
+        for ghost in self.ghosts:
+            parts.append(pack_ghost(ghost.y, ghost.prev_y, ghost.velocity, ghost.alive, ghost.score))
+        if flaps:
+            parts.append(struct.pack(f"<{len(self.flap_frames)}I", *self.flap_frames))
+        extra = self.snapshot_extra()
+        parts.append(struct.pack("<H", len(extra)))
+        parts.append(extra)
+        return b"".join(parts)
+
+    def restore(self, data):
+        """Put the game back as snapshot() found it and return its `state`.
+
+        The game must have the same ghosts (their controllers are not in
+        the snapshot) and, if it had one, the same course.
+        """
+        (version, flags, seed, frame, lives, total_lives, start_lives, heart_break_timer, score,
+         pipe_velocity, spawn_timer, spawn_interval, bird_y, bird_prev_y, bird_velocity, flap_count,
+         course_position, pipe_count, ghost_count, state_length) = _HEADER.unpack_from(data)
+        if version != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot version")
+        if ghost_count != len(self.ghosts):
+            raise ValueError(f"Snapshot has {ghost_count} ghosts, this game has {len(self.ghosts)}")
+        pos = _HEADER.size
+        state = data[pos:pos + state_length].decode()
+        pos += state_length
+
+        if self.seed != seed:
+            self.seed = seed
+            self.rng = random.Random(seed)
+        packed_rng = data[pos:pos + _RNG.size]
+        if packed_rng != self._packed_rng:
+            *internal, has_gauss, gauss = _RNG.unpack(packed_rng)
+            self.rng.setstate((3, tuple(internal), gauss if has_gauss else None))
+            self._packed_rng = packed_rng
+        pos += _RNG.size
+
+        self.game_over = bool(flags & 1)
+        self.game_started = bool(flags & 2)
+        self.game_ended = bool(flags & 4)
+        self.heart_break_animation = bool(flags & 8)
+        self.frame = frame
+        self.lives = lives
+        self.total_lives = total_lives
+        self.start_lives = start_lives
+        self.heart_break_timer = heart_break_timer
+        self.score = score
+        self.pipe_velocity = pipe_velocity
+        self.pipe_spawn_timer = spawn_timer
+        self.pipe_spawn_interval = spawn_interval
+
+        bird = self.bird
+        bird.y, bird.prev_y, bird.velocity = bird_y, bird_prev_y, bird_velocity
+        bird.alive = bool(flags & 16)
+
+        self.recycle_pipes()
+        pool = self.pipe_pool
+        for x, prev_x, velocity, gap_position, reversed_gap, scored in _PIPE.iter_unpack(
+                data[pos:pos + pipe_count * _PIPE.size]):
+            pipe = pool.pop() if pool else self.pipe_class(x, velocity, gap_position=gap_position)
+            pipe.respawn(x, velocity, reversed_gap, gap_position=gap_position, gap=self.physics.pipe_gap)
+            pipe.prev_x = prev_x
+            pipe.scored = scored
+            self.pipes.append(pipe)
+        pos += pipe_count * _PIPE.size
+
+        for ghost, (y, prev_y, velocity, alive, ghost_score) in zip(
+                self.ghosts, _GHOST.iter_unpack(data[pos:pos + ghost_count * _GHOST.size])):
+            ghost.y, ghost.prev_y, ghost.velocity = y, prev_y, velocity
+            ghost.alive = alive
+            ghost.score = ghost_score
+        pos += ghost_count * _GHOST.size
+
+        if flags & 32:
+            self.flap_frames = list(struct.unpack_from(f"<{flap_count}I", data, pos))
+            pos += 4 * flap_count
+        else:
+            del self.flap_frames[flap_count:]
+
+        if self.course is not None and course_position != NO_COURSE:
+            self.course.seek(course_position)
+
+        (extra_length,) = struct.unpack_from("<H", data, pos)
+        pos += 2
+        self.restore_extra(data[pos:pos + extra_length])
+        return state
+
+    def snapshot_extra(self):
+        """Subclass state to carry in snapshots, as bytes"""
+        return b""
+
+    def restore_extra(self, data):
+        """Apply what snapshot_extra() returned"""
+
+
+# ==================== AUTOPILOT ====================
+def pipe_ahead(bird, pipes):
+    """Nearest pipe not yet behind the bird, or None"""
+    ahead = None
+    for pipe in pipes:
+        if pipe.x + pipe.width >= bird.x and (ahead is None or pipe.x < ahead.x):
+            ahead = pipe
+    return ahead
+
+
+def hold_in_opening(game):
+    """Put the penguin in the middle of the next opening so it never crashes.
+
+    For tools that need a flawless run (nominal schedules, reachability
+    timelines, benchmarks): call it before every update.
+    """
+    bird = game.bird
+    ahead = pipe_ahead(bird, game.pipes)
+    if ahead is not None:
+        top, bottom = ahead.opening()
+        bird.y = (top + bottom) / 2 - 12  # Collision box centered in the opening
+    else:
+        bird.y = SCREEN_HEIGHT // 2
+    bird.velocity = 0
+
+
+# ==================== SNAPSHOTS ====================
+# A snapshot is _HEADER, the state string, _RNG (Mersenne Twister words,
+# then gauss_next), one _PIPE per pipe, one _GHOST per ghost, the flap
+# frames if included, and a length-prefixed blob from snapshot_extra().
+# About 2.7 KB, most of it the RNG.
+SNAPSHOT_VERSION = 1
+NO_COURSE = 0xFFFFFFFF
+_HEADER = struct.Struct("<BBQIbbbhIdIIdddIIHHB")
+_RNG = struct.Struct("<625I?d")
+_PIPE = struct.Struct("<dddH??")
+_GHOST = struct.Struct("<ddd?I")
+
+
+class SnapshotRing:
+    """The last `seconds` of per-step snapshots, for rewinding.
+
+    Slots are reused in a circle, so keeping the history costs one list
+    store per step.
+    """
+
+    def __init__(self, seconds=5, rate=FPS):
+        self.size = max(1, int(seconds * rate))
+        self._slots = [None] * self.size
+        self._next = 0
+        self.count = 0
+
+    def push(self, snapshot):
+        self._slots[self._next] = snapshot
+        self._next = (self._next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def back(self, steps):
+        """The snapshot from `steps` pushes ago (0 = the latest), clamped to the
+        oldest one kept. Everything newer is dropped, so pushing continues
+        from there. None if the ring is empty.
+        """
+        if not self.count:
+            return None
+        steps = min(steps, self.count - 1)
+        self._next = (self._next - steps - 1) % self.size
+        self.count -= steps + 1
+        snapshot = self._slots[self._next]
+        self.push(snapshot)
+        return snapshot
+
+    def clear(self):
+        self._slots = [None] * self.size
+        self._next = 0
+        self.count = 0
+
+
+# ==================== FIXED TIMESTEP ====================
+class FixedStepper:
+    """Turns elapsed wall-clock time into a whole number of simulation steps.
+
+    Every rule above is written per step, so running them at a fixed rate
+    keeps the game identical whatever the render rate. Time that does not
+    make up a whole step is carried over, and `alpha` says how far into the
+    next step the renderer is, for interpolating positions.
+    """
+
+    def __init__(self, rate=FPS, max_lag=0.25):
+        self.rate = rate
+        self.step_time = 1.0 / rate
+        # Catch-up limit after a long stall, in steps worth `max_lag` seconds
+        # so it scales with the rate (and never below one step)
+        self.max_steps = max(1, int(max_lag * rate))
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        """Add `elapsed` seconds and return how many steps to run now"""
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.step_time)
+        if steps > self.max_steps:
+            # Too far behind to catch up: drop the backlog instead of spiralling
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step_time
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a step since the last one ran, 0.0 to 1.0"""
+        return min(self.accumulator / self.step_time, 1.0)
@@ -0,0 +1,218 @@
+"""Physics sweep: how far does the reference bot get under each config?
+
+Every combination of the values given on the command line is a
+simulation.Physics config. Each one is played headlessly for --episodes
+seeded games by a bot (tournament.follow_gap unless --policy says
+otherwise), with every config's episodes spread over one process pool.
+
+The result per config is its survival curve: the share of games that
+reached each score. The table shows it at a few scores; --curves writes
+every point as CSV, one row per config.
+
+Final scores are cached in --cache, one JSON file per config and
+evaluation setup (policy, base seed, frame cap), named after its hash.
+Episode seeds only depend on the base seed and the episode index, so a
+re-run plays only configs it has not seen and episodes past the ones
+already cached - widening the grid or raising --episodes reuses the rest.
+Bump CACHE_VERSION when the game's rules change.
+
+    python sweep.py --gravity 0.10 0.12 0.14 --pipe-gap 140 160 180
+    python sweep.py --late-speedup 0.15 0.2 0.25 --episodes 2000 --curves curves.csv
+    python sweep.py --base cabinet.json --flap-strength -3.0 -3.4 --target 20 --save tuned.json
+    python main.py --physics tuned.json
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from scores import atomic_write
+from simulation import DEFAULT_PHYSICS, Physics
+from tournament import MAX_FRAMES, episode_seed, load_policy, play_episode
+
+CACHE_VERSION = 1
+DEFAULT_CACHE = ".sweep_cache"
+MARKS = (5, 10, 15, 25, 40, 60)  # Scores the table shows survival at
+
+
+def grid(base, values):
+    """Every Physics from `base` with each combination of {field: [values]}"""
+    fields = list(values)
+    return [base.replace(**dict(zip(fields, combo))) for combo in itertools.product(*values.values())]
+
+
+def survival_curve(scores):
+    """curve[s] = share of games that reached score s, for s = 0 .. best score"""
+    if not scores:
+        return [1.0]
+    counts = [0] * (max(scores) + 2)
+    for score in scores:
+        counts[score] += 1
+    curve = []
+    remaining = len(scores)
+    for count in counts[:-1]:
+        curve.append(remaining / len(scores))
+        remaining -= count
+    return curve
+
+
+def median(scores):
+    ordered = sorted(scores)
+    return ordered[len(ordered) // 2] if ordered else 0
+
+
+# ==================== CACHE ====================
+class ScoreCache:
+    """Final scores per (physics, policy, base seed, frame cap), one file each"""
+
+    def __init__(self, directory, policy, base_seed, max_frames):
+        self.directory = directory
+        self.setup = {"policy": policy, "base_seed": base_seed, "max_frames": max_frames, "version": CACHE_VERSION}
+
+    def key(self, physics):
+        text = json.dumps({"physics": physics.as_dict(), **self.setup}, sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+    def path(self, physics):
+        return os.path.join(self.directory, f"{self.key(physics)}.json")
+
+    def load(self, physics):
+        """Scores cached for `physics`, episode 0 first (empty if none)"""
+        try:
+            with open(self.path(physics), 'r') as f:
+                return json.load(f)["scores"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def save(self, physics, scores):
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(self.path(physics), json.dumps({"physics": physics.as_dict(), **self.setup, "scores": scores}))
+
+
+# ==================== EVALUATION ====================
+def _play_scores(policy, physics, base_seed, indices, max_frames):
+    """Worker entry point: final scores of a run of episode indices"""
+    return [play_episode(policy, episode_seed(base_seed, i), i, max_frames, physics).score for i in indices]
+
+
+def sweep(configs, policy, episodes, cache, workers=None, chunk_size=16, progress=None):
+    """Scores of the first `episodes` episodes under each config, playing only what is not cached.
+
+    progress(config, done, total) is called as episodes finish.
+    """
+    scores = {physics: cache.load(physics) for physics in configs}
+    jobs = []
+    for physics, known in scores.items():
+        del known[episodes:]
+        for start in range(len(known), episodes, chunk_size):
+            jobs.append((physics, start, range(start, min(start + chunk_size, episodes))))
+    if not jobs:
+        return scores
+
+    pending = {physics: {} for physics in configs}  # Finished chunks by start index, until contiguous
+    base_seed, max_frames = cache.setup["base_seed"], cache.setup["max_frames"]
+
+    def finished(physics, start, results):
+        known = scores[physics]
+        pending[physics][start] = results
+        while len(known) in pending[physics]:
+            known.extend(pending[physics].pop(len(known)))
+        if len(known) == episodes or not pending[physics]:
+            cache.save(physics, known)
+        if progress:
+            progress(physics, len(known), episodes)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for physics, start, indices in jobs:
+            finished(physics, start, _play_scores(policy, physics, base_seed, indices, max_frames))
+        return scores
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_play_scores, policy, physics, base_seed, indices, max_frames): (physics, start)
+                   for physics, start, indices in jobs}
+        for future in as_completed(futures):
+            finished(*futures[future], future.result())
+    return scores
+
+
+# ==================== COMMAND LINE ====================
+def describe(physics, fields):
+    return " ".join(f"{name}={getattr(physics, name)}" for name in fields) or "stock"
+
+
+def write_curves(filename, configs, scores, fields):
+    """One row per config: key, swept fields, then survival at score 0, 1, 2, ..."""
+    curves = [survival_curve(scores[physics]) for physics in configs]
+    length = max(len(curve) for curve in curves)
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["config", *fields, *(f"score_{s}" for s in range(length))])
+        for physics, curve in zip(configs, curves):
+            padded = curve + [0.0] * (length - len(curve))
+            writer.writerow([physics.key(), *(getattr(physics, name) for name in fields),
+                             *(f"{share:.4f}" for share in padded)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Survival curves of the reference bot over a grid of physics configs")
+    for name in Physics.FIELDS:
+        default = getattr(DEFAULT_PHYSICS, name)
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), nargs="+", metavar="V",
+                            help=f"values to try (default: {default})")
+    parser.add_argument("--base", metavar="FILE", help="JSON physics the grid starts from (default: the stock ones)")
+    parser.add_argument("--policy", default="tournament:follow_gap", help="module:function the bot plays")
+    parser.add_argument("--episodes", type=int, default=500, help="games per config")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for the episode seeds")
+    parser.add_argument("--max-frames", type=int, default=MAX_FRAMES, help="frame cap per game")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="directory for cached scores")
+    parser.add_argument("--curves", metavar="CSV", help="write every config's full survival curve here")
+    parser.add_argument("--target", type=int, metavar="SCORE", help="pick the config whose median score is closest")
+    parser.add_argument("--save", metavar="FILE", help="save the --target pick as JSON (for main.py --physics)")
+    args = parser.parse_args(argv)
+    if args.save and args.target is None:
+        parser.error("--save needs --target")
+
+    values = {name: getattr(args, name) for name in Physics.FIELDS if getattr(args, name) is not None}
+    try:
+        base = Physics.load(args.base) if args.base else DEFAULT_PHYSICS
+        configs = list(dict.fromkeys(grid(base, values)))
+    except (TypeError, ValueError) as e:
+        parser.error(str(e))
+    fields = list(values)
+    cache = ScoreCache(args.cache, args.policy, args.seed, args.max_frames)
+
+    def progress(physics, done, total):
+        if done == total:
+            print(f"  {describe(physics, fields)}: done", file=sys.stderr, flush=True)
+
+    print(f"{len(configs)} configs x {args.episodes} episodes", file=sys.stderr)
+    scores = sweep(configs, load_policy(args.policy), args.episodes, cache, args.workers, args.chunk_size, progress)
+
+    marks = "".join(f"{f'>={mark}':>7}" for mark in MARKS)
+    print(f"{'config':<16}  {'mean':>7} {'median':>6} {marks}  settings")
+    for physics in configs:
+        curve = survival_curve(scores[physics])
+        shares = "".join(f"{curve[mark] if mark < len(curve) else 0.0:>7.1%}" for mark in MARKS)
+        mean = sum(scores[physics]) / max(len(scores[physics]), 1)
+        print(f"{physics.key():<16}  {mean:>7.2f} {median(scores[physics]):>6} {shares}  {describe(physics, fields)}")
+
+    if args.curves:
+        write_curves(args.curves, configs, scores, fields)
+        print(f"curves written to {args.curves}", file=sys.stderr)
+    if args.target is not None:
+        pick = min(configs, key=lambda physics: abs(median(scores[physics]) - args.target))
+        print(f"closest to a median of {args.target}: {pick.key()} {describe(pick, fields)}")
+        if args.save:
+            pick.save(args.save)
+            print(f"saved to {args.save}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
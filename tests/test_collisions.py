@@ -0,0 +1,163 @@
+"""High-speed edge cases for swept collisions and the collision broad phase"""
+import pytest
+
+import simulation
+from simulation import Bird, Game, Pipe, rects_collide
+
+BIRD_X = simulation.SCREEN_WIDTH // 4  # Collision box spans x 130-150
+GAP_TOP = 200  # Opening is y 200-360 with the default gap
+IN_TOP_PIPE = 100
+IN_GAP = 250
+IN_BOTTOM_PIPE = 400
+SPEEDS = (-60, -100, -300)
+JUMPS = (-100, -300)  # Fast enough to get from one side of the bird to the other
+
+
+def moved_pipe(prev_x, velocity):
+    """A pipe that has just been updated from prev_x"""
+    pipe = Pipe(prev_x, velocity, gap_position=GAP_TOP)
+    pipe.update()
+    return pipe
+
+
+def hovering_bird(y, x=BIRD_X):
+    """A bird that did not move vertically during the last update"""
+    return Bird(x, y)
+
+
+def brute_force(pipe, bird, samples=2000):
+    """Whether the bird touched the pipe at any sampled point of the step"""
+    for i in range(samples + 1):
+        t = i / samples
+        x = pipe.prev_x + t * (pipe.x - pipe.prev_x)
+        y = bird.prev_y + t * (bird.y - bird.prev_y)
+        box = (bird.x + 5, y + 2, 20, 20)
+        if rects_collide(box, (x, 0, pipe.width, pipe.top_pipe_height)) or \
+                rects_collide(box, (x, pipe.bottom_y, pipe.width, pipe.bottom_pipe_height)):
+            return True
+    return False
+
+
+# ==================== SWEPT COLLISIONS ====================
+@pytest.mark.parametrize("velocity", JUMPS)
+@pytest.mark.parametrize("y", [IN_TOP_PIPE, IN_BOTTOM_PIPE])
+def test_pipe_jumping_over_the_bird_hits(velocity, y):
+    # Starts right of the bird and ends left of it, so neither end overlaps
+    pipe = moved_pipe(BIRD_X + 30, velocity)
+    bird = hovering_bird(y)
+    assert pipe.x + pipe.width < BIRD_X + 5
+    assert not pipe.check_collision(bird)
+    assert pipe.check_swept_collision(bird)
+
+
+@pytest.mark.parametrize("velocity", SPEEDS)
+def test_passing_through_the_gap_is_clean(velocity):
+    pipe = moved_pipe(BIRD_X + 30, velocity)
+    assert not pipe.check_swept_collision(hovering_bird(IN_GAP))
+
+
+@pytest.mark.parametrize("y", [IN_TOP_PIPE, IN_BOTTOM_PIPE])
+def test_pipe_faster_than_the_bird_is_wide_hits(y):
+    # Moves 60px, three bird widths, and still overlaps the bird at the end
+    pipe = moved_pipe(BIRD_X + 30, -60)
+    assert pipe.check_swept_collision(hovering_bird(y))
+
+
+@pytest.mark.parametrize("velocity", JUMPS)
+def test_bird_leaving_the_pipe_during_the_step_hits(velocity):
+    pipe = moved_pipe(BIRD_X + 30, velocity)
+    bird = hovering_bird(IN_GAP)
+    # Rises out of the bottom pipe, but only after the pipe reached it
+    bird.prev_y = IN_BOTTOM_PIPE
+    assert pipe.check_swept_collision(bird)
+
+
+def test_bird_reaching_the_pipe_after_it_passed_is_clean():
+    # The pipe overlaps the bird for the first third of the step, while the
+    # bird is still in the gap; it is only level with the bottom pipe later
+    pipe = moved_pipe(BIRD_X + 30, -300)
+    bird = hovering_bird(IN_BOTTOM_PIPE)
+    bird.prev_y = IN_GAP
+    assert not pipe.check_collision(bird)
+    assert not pipe.check_swept_collision(bird)
+
+
+@pytest.mark.parametrize("velocity", SPEEDS)
+def test_pipe_passing_before_the_bird_is_missed(velocity):
+    # Already completely left of the bird when the step starts
+    pipe = moved_pipe(BIRD_X - 60, velocity)
+    assert not pipe.check_swept_collision(hovering_bird(IN_TOP_PIPE))
+
+
+@pytest.mark.parametrize("velocity", SPEEDS)
+@pytest.mark.parametrize("y", [IN_TOP_PIPE, IN_GAP, 190, 345, IN_BOTTOM_PIPE])
+def test_swept_matches_brute_force(velocity, y):
+    for prev_x in range(BIRD_X - 80, BIRD_X + 320, 7):
+        pipe = moved_pipe(prev_x, velocity)
+        bird = hovering_bird(y)
+        assert pipe.check_swept_collision(bird) == brute_force(pipe, bird), prev_x
+
+
+@pytest.mark.parametrize("prev_x, hit", [(BIRD_X - 20, True), (BIRD_X + 30, False), (BIRD_X - 60, False)])
+def test_stationary_pipe(prev_x, hit):
+    pipe = moved_pipe(prev_x, 0)
+    assert pipe.x - pipe.prev_x == 0
+    assert pipe.check_swept_collision(hovering_bird(IN_TOP_PIPE)) == hit
+    assert not pipe.check_swept_collision(hovering_bird(IN_GAP))
+
+
+def test_pipe_partly_off_screen_truncates_like_pygame():
+    # x -30.5 truncates to -30, so the pipe's right edge is 22, not 21.5
+    pipe = moved_pipe(-30.5, 0)
+    for bird_x in (10.0, 16.4, 16.7, 17.0, 18.0):
+        bird = hovering_bird(IN_TOP_PIPE, bird_x)
+        expected = rects_collide(simulation.make_rect(bird.x + 5, bird.y + 2, 20, 20), pipe.top_rect())
+        assert pipe.check_collision(bird) == expected, bird_x
+        assert pipe.check_swept_collision(bird) == expected, bird_x
+    assert pipe.check_collision(hovering_bird(IN_TOP_PIPE, 16.7))
+
+
+def test_pipe_sliding_off_screen_is_still_hit():
+    # Sweeps from x -10 to -40 past a bird near the left edge
+    pipe = moved_pipe(-10, -30)
+    assert pipe.check_swept_collision(hovering_bird(IN_TOP_PIPE, 10))
+    assert not pipe.check_swept_collision(hovering_bird(IN_GAP, 10))
+
+
+# ==================== BROAD PHASE ====================
+def game_with_pipe(prev_x, velocity, y, swept=True):
+    """A started game whose only pipe is about to move from prev_x"""
+    game = Game(seed=0)
+    game.swept_collisions = swept
+    game.pipe_spawn_timer = -10 ** 6  # No other pipes
+    game.game_started = True
+    game.bird.y = game.bird.prev_y = y
+    game.bird.velocity = -game.physics.gravity  # Hovers through the update
+    game.pipes.append(Pipe(prev_x, velocity, gap_position=GAP_TOP))
+    return game
+
+
+@pytest.mark.parametrize("velocity", JUMPS)
+def test_broad_phase_keeps_fast_pipes(velocity):
+    game = game_with_pipe(BIRD_X + 30, velocity, IN_TOP_PIPE)
+    game.update()
+    assert game.game_over
+
+
+@pytest.mark.parametrize("velocity", JUMPS)
+def test_unswept_game_misses_fast_pipes(velocity):
+    game = game_with_pipe(BIRD_X + 30, velocity, IN_TOP_PIPE, swept=False)
+    game.update()
+    assert not game.game_over
+
+
+@pytest.mark.parametrize("swept", [True, False])
+@pytest.mark.parametrize("velocity", SPEEDS + (-1.8, 0))
+@pytest.mark.parametrize("y", [IN_TOP_PIPE, IN_GAP, IN_BOTTOM_PIPE])
+def test_broad_phase_agrees_with_the_narrow_phase(velocity, y, swept):
+    for prev_x in range(-60, simulation.SCREEN_WIDTH + 60, 5):
+        game = game_with_pipe(prev_x, velocity, y, swept)
+        pipe = game.pipes[0]
+        game.update()
+        narrow = pipe.check_swept_collision if swept else pipe.check_collision
+        assert game.game_over == narrow(game.bird), prev_x
@@ -0,0 +1,177 @@
+"""Tournament runner: score a flap policy over many seeded episodes.
+
+A policy is any picklable callable policy(bird, pipes) -> bool that returns
+True to flap. Episodes are spread over a process pool, each with a seed
+derived from (base_seed, episode index), so the statistics come out the same
+whatever the number of workers.
+
+    python tournament.py --episodes 2000
+    python tournament.py --policy mybots:cautious --workers 8
+    python tournament.py --physics cabinet.json     # other physics (see sweep.py)
+"""
+import argparse
+import importlib
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import simulation
+from simulation import SCREEN_HEIGHT
+
+MAX_FRAMES = 100000  # Per episode, so a perfect policy still finishes
+
+EpisodeResult = namedtuple("EpisodeResult", "index seed score lives_used frames")
+
+
+# ==================== REFERENCE POLICY ====================
+def follow_gap(bird, pipes, margin=10):
+    """Flap whenever the penguin sinks `margin` pixels below the middle of the next opening"""
+    ahead = simulation.pipe_ahead(bird, pipes)
+    if ahead is not None:
+        top, bottom = ahead.opening()
+        middle = (top + bottom) / 2
+    else:
+        middle = SCREEN_HEIGHT // 2  # Middle of a centered opening, whatever its height
+    return bird.y + bird.height // 2 > middle + margin and bird.velocity > 0
+
+
+# ==================== EPISODES ====================
+def episode_seed(base_seed, index):
+    """Seed for one episode - stable across processes and Python runs"""
+    return random.Random(f"{base_seed}:{index}").getrandbits(64)
+
+
+def play_episode(policy, seed, index=0, max_frames=MAX_FRAMES, physics=None):
+    """Play one full game (all lives) headlessly"""
+    game = simulation.Game(seed, physics)
+    frames = 0
+    while not game.game_ended and frames < max_frames:
+        game.step(policy(game.bird, game.pipes))
+        frames += 1
+    return EpisodeResult(index, seed, game.score, game.lives_used, frames)
+
+
+def _play_chunk(policy, base_seed, indices, max_frames, physics=None):
+    """Worker entry point: play a run of episode indices"""
+    return [play_episode(policy, episode_seed(base_seed, i), i, max_frames, physics) for i in indices]
+
+
+# ==================== STATISTICS ====================
+class TournamentStats:
+    """Running totals over finished episodes.
+
+    Only integer sums and maxima are kept, so the order episodes finish in
+    cannot change the result.
+    """
+
+    def __init__(self, episodes_total):
+        self.episodes_total = episodes_total
+        self.episodes = 0
+        self.score_total = 0
+        self.score_max = 0
+        self.lives_used_total = 0
+        self.frames_total = 0
+        self.frames_max = 0
+
+    def add(self, result):
+        self.episodes += 1
+        self.score_total += result.score
+        self.score_max = max(self.score_max, result.score)
+        self.lives_used_total += result.lives_used
+        self.frames_total += result.frames
+        self.frames_max = max(self.frames_max, result.frames)
+
+    @property
+    def done(self):
+        return self.episodes >= self.episodes_total
+
+    @property
+    def score_mean(self):
+        return self.score_total / self.episodes if self.episodes else 0.0
+
+    @property
+    def lives_used_mean(self):
+        return self.lives_used_total / self.episodes if self.episodes else 0.0
+
+    @property
+    def frames_mean(self):
+        return self.frames_total / self.episodes if self.episodes else 0.0
+
+    def as_dict(self):
+        return {
+            "episodes": self.episodes,
+            "score_mean": self.score_mean,
+            "score_max": self.score_max,
+            "lives_used_mean": self.lives_used_mean,
+            "frames_mean": self.frames_mean,
+            "frames_max": self.frames_max,
+        }
+
+    def __str__(self):
+        return (f"{self.episodes}/{self.episodes_total} episodes  "
+                f"score mean {self.score_mean:.2f} max {self.score_max}  "
+                f"lives used {self.lives_used_mean:.2f}  "
+                f"frames mean {self.frames_mean:.0f} max {self.frames_max}")
+
+
+def run_tournament(policy, episodes, base_seed=0, workers=None, chunk_size=16, max_frames=MAX_FRAMES,
+                   physics=None):
+    """Play `episodes` games and yield the running stats as chunks finish.
+
+    workers defaults to every core; workers=1 plays in this process.
+    """
+    stats = TournamentStats(episodes)
+    chunks = [range(start, min(start + chunk_size, episodes)) for start in range(0, episodes, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for indices in chunks:
+            for result in _play_chunk(policy, base_seed, indices, max_frames, physics):
+                stats.add(result)
+            yield stats
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_play_chunk, policy, base_seed, indices, max_frames, physics) for indices in chunks]
+        for future in as_completed(futures):
+            for result in future.result():
+                stats.add(result)
+            yield stats
+
+
+def evaluate(policy, episodes, base_seed=0, workers=None, **kwargs):
+    """Run a tournament to the end and return the final stats"""
+    stats = TournamentStats(episodes)
+    for stats in run_tournament(policy, episodes, base_seed, workers, **kwargs):
+        pass
+    return stats
+
+
+def load_policy(spec):
+    """Resolve a "module:function" policy name"""
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a flap policy over many seeded episodes")
+    parser.add_argument("--policy", default="tournament:follow_gap", help="module:function to evaluate")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="base seed for the episode seeds")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--physics", metavar="FILE", help="JSON physics settings (default: the stock ones)")
+    args = parser.parse_args(argv)
+
+    policy = load_policy(args.policy)
+    try:
+        physics = simulation.Physics.load(args.physics) if args.physics else None
+    except (TypeError, ValueError) as e:
+        parser.error(f"{args.physics}: {e}")
+    for stats in run_tournament(policy, args.episodes, args.seed, args.workers, args.chunk_size, physics=physics):
+        print(stats, flush=True)
+
+
+if __name__ == "__main__":
+    main()
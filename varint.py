@@ -0,0 +1,27 @@
+"""Unsigned LEB128 varints, shared by the replay and course file formats.
+
+Small numbers take one byte: 7 bits per byte, low bits first, with the
+high bit set on every byte but the last.
+"""
+
+
+def write_varint(out, value):
+    """Append `value` to the bytearray `out`"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos, what="data"):
+    """(value, position after it) for the varint at data[pos]; `what` names the file in errors"""
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError(f"Truncated {what}")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7